@@ -1,7 +1,64 @@
 from __future__ import annotations
 
 import re
-from typing import Any, Dict, List, Optional, Tuple
+from functools import lru_cache
+from itertools import islice
+from typing import Any, Dict, FrozenSet, List, Optional, Pattern, Set, Tuple
+
+# 命名漂移：仅英文/数字专名（模块加载时编译一次）
+_NAMING_RE = re.compile(r"\b[A-Z][A-Za-z0-9_-]{2,}\b")
+# 正文过短时专名漂移没有参考意义，直接跳过（省去正则扫描与 glossary 构建）
+_NAMING_MIN_CHARS = 200
+# 第三人称要求下的第一人称检测：我/我们/俺/咱（“我们”已被“我”覆盖）
+_POV_FIRST_PERSON_RE = re.compile("[我俺咱]")
+
+# 明显 AI/元话语（硬伤）
+_BAD_PHRASES: Tuple[str, ...] = (
+    "作为AI",
+    "作为一个AI",
+    "我无法",
+    "我不能",
+    "以下将",
+    "接下来将",
+    "本文将",
+)
+
+# 只读的空 dict 占位（避免热循环中反复分配）
+_EMPTY: Dict[str, Any] = {}
+
+# finding 模板：type/severity/suggest 固定，按需 copy 后只填 message（保持原字段顺序）
+_FINDING_TEMPLATES: Dict[str, Dict[str, Any]] = {
+    "length_short": {"type": "length", "severity": "medium", "message": "", "suggest": "note"},
+    "length_long": {"type": "length", "severity": "medium", "message": "", "suggest": "note"},
+    "length_long_severe": {"type": "length", "severity": "high", "message": "", "suggest": "rewrite"},
+    "meta": {"type": "meta", "severity": "high", "message": "", "suggest": "rewrite"},
+    "prohibited_phrases": {"type": "prohibited_phrases", "severity": "high", "message": "", "suggest": "rewrite"},
+    "required_phrases": {"type": "required_phrases", "severity": "low", "message": "", "suggest": "note"},
+    "pov": {"type": "pov", "severity": "medium", "message": "", "suggest": "rewrite"},
+    "naming_drift": {"type": "naming_drift", "severity": "medium", "message": "", "suggest": "note"},
+    "materials_blocker": {"type": "materials_blocker", "severity": "blocker", "message": "", "suggest": "escalate"},
+    "editor": {"type": "editor", "severity": "high", "message": "", "suggest": "rewrite"},
+}
+
+# 冻结材料包 glossary（小写）缓存：id -> (pack, terms)。
+# 持有 pack 强引用并做 `is` 校验，避免对象释放后 id 被复用导致误命中。
+_GLOSSARY_CACHE: Dict[int, Tuple[Any, FrozenSet[str]]] = {}
+_GLOSSARY_CACHE_MAX = 8
+
+
+def _finding(kind: str, message: str) -> Dict[str, Any]:
+    f = _FINDING_TEMPLATES[kind].copy()
+    f["message"] = message
+    return f
+
+
+def _norm(x: Any) -> str:
+    """
+    等价于 str(x or "").strip()，但对已是 str 的值少一次包装/分配。
+    """
+    if not x:
+        return ""
+    return x.strip() if type(x) is str else str(x).strip()
 
 
 def _get(d: Any, path: str) -> Any:
@@ -13,37 +70,57 @@ def _get(d: Any, path: str) -> Any:
     return cur
 
 
-def _count_blockers(open_questions: Any) -> int:
+def _scan_blockers(open_questions: Any, *, max_items: int = 20) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    单次遍历 open_questions：返回 (blocker 总数, 前 max_items 条 blocker 原样副本)。
+    """
     if not isinstance(open_questions, list):
-        return 0
+        return 0, []
+    limit = int(max_items)
     n = 0
+    out: List[Dict[str, Any]] = []
     for it in open_questions:
         if not isinstance(it, dict):
             continue
-        sev = str(it.get("severity", "") or "").strip().lower()
-        blocking = it.get("blocking", None)
-        if sev == "blocker" or blocking is True:
+        sev = _norm(it.get("severity")).lower()
+        if sev == "blocker" or it.get("blocking", None) is True:
             n += 1
-    return n
+            if len(out) < limit:
+                out.append(dict(it))
+    return n, out
 
 
-def _pick_blockers(open_questions: Any, *, max_items: int = 20) -> List[Dict[str, Any]]:
+@lru_cache(maxsize=64)
+def _phrase_matcher(phrases: Tuple[str, ...]) -> Optional[Pattern[str]]:
     """
-    从 open_questions 中挑出 blocker 项（不猜字段结构，原样保留 dict），用于审计/追溯。
+    把一组短语编译成一个“零宽前瞻 + 交替”的正则（长词优先），按短语集合缓存。
+    一次 finditer 即可扫完正文，取代逐个 `p in text`。
     """
-    if not isinstance(open_questions, list):
-        return []
-    out: List[Dict[str, Any]] = []
-    for it in open_questions:
-        if not isinstance(it, dict):
-            continue
-        sev = str(it.get("severity", "") or "").strip().lower()
-        blocking = it.get("blocking", None)
-        if sev == "blocker" or blocking is True:
-            out.append(dict(it))
-        if len(out) >= int(max_items):
+    uniq = sorted({p for p in phrases if p}, key=len, reverse=True)
+    if not uniq:
+        return None
+    return re.compile("(?=(" + "|".join(re.escape(p) for p in uniq) + "))")
+
+
+def scan_phrases(text: str, phrases: Tuple[str, ...]) -> Set[str]:
+    """
+    单次扫描返回 text 中出现过的短语集合。
+    同一位置只会命中最长的候选；其前缀/子串短语通过已命中集合补齐，结果与逐个 `in` 一致。
+    """
+    pat = _phrase_matcher(phrases)
+    if pat is None or not text:
+        return set()
+    # 所有候选都已命中就不必扫完剩下的正文（模板审核里项目名通常出现在开头）
+    want = len({p for p in phrases if p})
+    found: Set[str] = set()
+    for m in pat.finditer(text):
+        found.add(m.group(1))
+        if len(found) >= want:
             break
-    return out
+    for p in phrases:
+        if p and p not in found and any(p in q for q in found):
+            found.add(p)
+    return found
 
 
 def _extract_constraints(frozen_pack: Dict[str, Any]) -> Dict[str, Any]:
@@ -57,14 +134,18 @@ def resolve_anchor_details(anchors_index: Any, anchor_ids: List[str]) -> List[Di
     不猜 anchors：只解析你手工给出的 anchors 列表，返回可读的 title/path。
     anchors_index 期望结构：{"anchors": {"DEC-001": {"path": "...", "title": "..."}, ...}}
     """
-    idx = anchors_index if isinstance(anchors_index, dict) else {}
-    by = idx.get("anchors") if isinstance(idx.get("anchors"), dict) else {}
+    idx = anchors_index if isinstance(anchors_index, dict) else _EMPTY
+    by = idx.get("anchors")
+    if not isinstance(by, dict):
+        by = _EMPTY
     out: List[Dict[str, str]] = []
     for a in anchor_ids:
-        key = str(a or "").strip()
+        key = _norm(a)
         if not key:
             continue
-        info = by.get(key) if isinstance(by.get(key), dict) else {}
+        info = by.get(key)
+        if not isinstance(info, dict):
+            info = _EMPTY
         out.append(
             {
                 "id": key,
@@ -75,25 +156,30 @@ def resolve_anchor_details(anchors_index: Any, anchor_ids: List[str]) -> List[Di
     return out
 
 
+def _format_digest(act: str, risk_level: str, top: str, max_len: int) -> str:
+    parts = ["建议=", act or "N/A"]
+    if risk_level:
+        parts.append(" | 风险=")
+        parts.append(risk_level)
+    if top:
+        parts.append(" | Top=")
+        parts.append(top)
+    s = "".join(parts)
+    if len(s) > int(max_len):
+        s = s[: max(0, int(max_len) - 1)].rstrip() + "…"
+    return s
+
+
 def advisor_digest_line(advisor_report: Any, *, max_len: int = 120) -> str:
     """
     将顾问报告压成一行摘要，适合塞进审阅卡。
     """
     rep = advisor_report if isinstance(advisor_report, dict) else {}
-    act = str(rep.get("suggested_action", "") or "").strip() or "N/A"
-    risk_level = str(rep.get("risk_level", "") or "").strip()
-    findings = rep.get("findings") if isinstance(rep.get("findings"), list) else []
+    findings = rep.get("findings")
     top = ""
-    if findings and isinstance(findings[0], dict):
-        top = str(findings[0].get("message", "") or "").strip()
-    s = f"建议={act}"
-    if risk_level:
-        s += f" | 风险={risk_level}"
-    if top:
-        s += f" | Top={top}"
-    if len(s) > int(max_len):
-        s = s[: max(0, int(max_len) - 1)].rstrip() + "…"
-    return s
+    if isinstance(findings, list) and findings and isinstance(findings[0], dict):
+        top = _norm(findings[0].get("message"))
+    return _format_digest(_norm(rep.get("suggested_action")), _norm(rep.get("risk_level")), top, max_len)
 
 
 def _extract_glossary_terms(frozen_pack: Dict[str, Any]) -> List[str]:
@@ -105,16 +191,31 @@ def _extract_glossary_terms(frozen_pack: Dict[str, Any]) -> List[str]:
             continue
         for it in arr:
             if isinstance(it, dict):
-                t = str(it.get("term", "") or "").strip()
+                t = _norm(it.get("term"))
                 if t:
                     terms.append(t)
             else:
-                t = str(it or "").strip()
+                t = _norm(it)
                 if t:
                     terms.append(t)
     return terms
 
 
+def _glossary_lower_set(frozen_pack: Dict[str, Any]) -> FrozenSet[str]:
+    """
+    冻结材料包在一次运行内不变：按对象缓存小写 glossary 集合，避免每章重复提取。
+    """
+    k = id(frozen_pack)
+    hit = _GLOSSARY_CACHE.get(k)
+    if hit is not None and hit[0] is frozen_pack:
+        return hit[1]
+    terms = frozenset(t.lower() for t in _extract_glossary_terms(frozen_pack))
+    if len(_GLOSSARY_CACHE) >= _GLOSSARY_CACHE_MAX:
+        _GLOSSARY_CACHE.clear()
+    _GLOSSARY_CACHE[k] = (frozen_pack, terms)
+    return terms
+
+
 def build_advisor_report(
     *,
     chapter_text: str,
@@ -129,7 +230,7 @@ def build_advisor_report(
     """
     text = str(chapter_text or "")
     rep = editor_report if isinstance(editor_report, dict) else {}
-    editor_decision = str(rep.get("decision", "") or "").strip()
+    editor_decision = _norm(rep.get("decision"))
 
     constraints = _extract_constraints(frozen_pack if isinstance(frozen_pack, dict) else {})
     target_words = int(constraints.get("target_words", 0) or 0)
@@ -140,9 +241,9 @@ def build_advisor_report(
     chars = len(text)
 
     # blocker 兜底检查（理论上冻结门禁已阻止）
-    oq = _get(frozen_pack, "risk.open_questions")
-    blocker_items = _pick_blockers(oq)
-    blockers = len(blocker_items)
+    risk = frozen_pack.get("risk") if isinstance(frozen_pack, dict) else None
+    oq = risk.get("open_questions") if isinstance(risk, dict) else None
+    blockers, blocker_items = _scan_blockers(oq)
 
     findings: List[Dict[str, Any]] = []
 
@@ -150,133 +251,86 @@ def build_advisor_report(
     if target_words > 0 and (min_chars > 0 and max_chars > 0):
         if chars < min_chars:
             findings.append(
-                {
-                    "type": "length",
-                    "severity": "medium",
-                    "message": f"正文偏短：{chars} < {min_chars}（target_words={target_words}, ratio={min_ratio}）",
-                    "suggest": "note",
-                }
+                _finding(
+                    "length_short",
+                    f"正文偏短：{chars} < {min_chars}（target_words={target_words}, ratio={min_ratio}）",
+                )
             )
         elif chars > max_chars:
             # 严重超限：> 上限的 20% 才建议 rewrite
             severe = chars > int(max_chars * 1.2)
             findings.append(
-                {
-                    "type": "length",
-                    "severity": "high" if severe else "medium",
-                    "message": f"正文偏长：{chars} > {max_chars}（target_words={target_words}, ratio={max_ratio}）",
-                    "suggest": "rewrite" if severe else "note",
-                }
+                _finding(
+                    "length_long_severe" if severe else "length_long",
+                    f"正文偏长：{chars} > {max_chars}（target_words={target_words}, ratio={max_ratio}）",
+                )
             )
 
-    # 2) 明显 AI/元话语（硬伤）
-    bad_phrases = [
-        "作为AI",
-        "作为一个AI",
-        "我无法",
-        "我不能",
-        "以下将",
-        "接下来将",
-        "本文将",
-    ]
-    hit = [p for p in bad_phrases if p in text]
-    if hit:
-        findings.append(
-            {
-                "type": "meta",
-                "severity": "high",
-                "message": f"疑似元话语/AI腔命中：{', '.join(hit[:5])}",
-                "suggest": "rewrite",
-            }
-        )
-
     # 2.1) 可选：材料包执行层禁用/必须词（只在材料包提供时启用，避免拍脑袋）
     prohibited = constraints.get("prohibited_phrases")
+    bad: List[str] = []
     if isinstance(prohibited, list):
-        bad = [str(x or "").strip() for x in prohibited if str(x or "").strip()]
-        hit2 = [p for p in bad if p and p in text]
-        if hit2:
-            findings.append(
-                {
-                    "type": "prohibited_phrases",
-                    "severity": "high",
-                    "message": f"命中冻结材料禁用词：{', '.join(hit2[:6])}",
-                    "suggest": "rewrite",
-                }
-            )
+        bad = [t for t in map(_norm, prohibited) if t]
 
     required = constraints.get("required_phrases")
+    req: List[str] = []
     if isinstance(required, list):
-        req = [str(x or "").strip() for x in required if str(x or "").strip()]
-        missing = [p for p in req if p and (p not in text)]
-        if missing:
-            findings.append(
-                {
-                    "type": "required_phrases",
-                    "severity": "low",
-                    "message": f"可能缺少必须词（材料包要求）：{', '.join(missing[:6])}",
-                    "suggest": "note",
-                }
-            )
+        req = [t for t in map(_norm, required) if t]
 
     # 2.2) 可选：POV（材料包提供才启用）
-    pov = str(constraints.get("pov", "") or "").strip().lower()
-    if pov in {"third", "3rd", "第三人称"}:
-        if any(p in text for p in ("我", "我们", "俺", "咱")):
-            findings.append(
-                {
-                    "type": "pov",
-                    "severity": "medium",
-                    "message": "疑似人称漂移：材料包要求第三人称，但正文出现第一人称（如“我/我们”）",
-                    "suggest": "rewrite",
-                }
-            )
+    pov = _norm(constraints.get("pov")).lower()
+    pov_third = pov in {"third", "3rd", "第三人称"}
+
+    # 以上短语合并为一次扫描（POV 单字用字符类单独判断）
+    found = scan_phrases(text, _BAD_PHRASES + tuple(bad) + tuple(req))
+
+    # 2) 明显 AI/元话语（硬伤）
+    hit = list(islice((p for p in _BAD_PHRASES if p in found), 5))
+    if hit:
+        findings.append(_finding("meta", f"疑似元话语/AI腔命中：{', '.join(hit)}"))
+
+    if bad:
+        hit2 = list(islice((p for p in bad if p in found), 6))
+        if hit2:
+            findings.append(_finding("prohibited_phrases", f"命中冻结材料禁用词：{', '.join(hit2)}"))
+
+    if req:
+        missing = list(islice((p for p in req if p not in found), 6))
+        if missing:
+            findings.append(_finding("required_phrases", f"可能缺少必须词（材料包要求）：{', '.join(missing)}"))
+
+    if pov_third:
+        if _POV_FIRST_PERSON_RE.search(text):
+            findings.append(_finding("pov", "疑似人称漂移：材料包要求第三人称，但正文出现第一人称（如“我/我们”）"))
 
     # 2.3) 命名漂移（轻量、低误报版）：仅检查英文专名（naming_policy 提示“禁止新增专名”时启用）
-    naming_policy = str(constraints.get("naming_policy", "") or "").strip()
-    if naming_policy and ("禁止" in naming_policy or "严禁" in naming_policy):
-        allowed = set(t.lower() for t in _extract_glossary_terms(frozen_pack))
+    naming_policy = _norm(constraints.get("naming_policy"))
+    if chars >= _NAMING_MIN_CHARS and naming_policy and ("禁止" in naming_policy or "严禁" in naming_policy):
+        allowed = _glossary_lower_set(frozen_pack)
         # 仅英文/数字专名：避免中文分词误报
-        candidates = re.findall(r"\b[A-Z][A-Za-z0-9_-]{2,}\b", text)
-        unknown = [w for w in candidates if w.lower() not in allowed]
+        candidates = _NAMING_RE.findall(text)
+        unknown = list(islice((w for w in candidates if w.lower() not in allowed), 6))
         if unknown:
-            findings.append(
-                {
-                    "type": "naming_drift",
-                    "severity": "medium",
-                    "message": f"疑似新增英文专名（未在冻结glossary中）：{', '.join(unknown[:6])}",
-                    "suggest": "note",
-                }
-            )
+            findings.append(_finding("naming_drift", f"疑似新增英文专名（未在冻结glossary中）：{', '.join(unknown)}"))
 
     # 3) 冻结材料包 blocker（应先处理）
     if blockers > 0:
-        findings.append(
-            {
-                "type": "materials_blocker",
-                "severity": "blocker",
-                "message": f"冻结材料包仍存在 blocker open_questions：{blockers}（应先处理后再写作）",
-                "suggest": "escalate",
-            }
-        )
+        findings.append(_finding("materials_blocker", f"冻结材料包仍存在 blocker open_questions：{blockers}（应先处理后再写作）"))
 
     # 4) 主编结论（参考）
     if editor_decision and editor_decision != "审核通过":
-        findings.append(
-            {
-                "type": "editor",
-                "severity": "high",
-                "message": f"主编未通过：{editor_decision}",
-                "suggest": "rewrite",
-            }
-        )
+        findings.append(_finding("editor", f"主编未通过：{editor_decision}"))
 
     # 建议动作：blocker>rewrite>accept（note 不影响建议动作）
-    suggested_action = "accept"
-    if any(f.get("suggest") == "escalate" for f in findings):
-        suggested_action = "escalate"
-    elif any(f.get("suggest") == "rewrite" for f in findings):
-        suggested_action = "rewrite"
+    has_escalate = has_rewrite = False
+    for f in findings:
+        sg = f.get("suggest")
+        if sg == "escalate":
+            has_escalate = True
+            break
+        if sg == "rewrite":
+            has_rewrite = True
+    suggested_action = "escalate" if has_escalate else ("rewrite" if has_rewrite else "accept")
 
     # 风险分级（轻量、可查询）：blocker > high > medium > low
     # - blocker：材料包仍有 blocker open_questions（写作应暂停）
@@ -286,11 +340,9 @@ def build_advisor_report(
     risk_level = "low"
     if blockers > 0:
         risk_level = "blocker"
-    elif suggested_action == "escalate":
-        risk_level = "high"
-    elif suggested_action == "rewrite":
+    elif has_escalate or has_rewrite:
         risk_level = "high"
-    elif len(findings) > 0:
+    elif findings:
         risk_level = "medium"
 
     return {
@@ -298,7 +350,7 @@ def build_advisor_report(
         "risk_level": risk_level,
         "materials_blockers_count": int(blockers),
         "materials_blockers": blocker_items,
-        "digest": advisor_digest_line({"suggested_action": suggested_action, "risk_level": risk_level, "findings": findings}),
+        "digest": _format_digest(suggested_action, risk_level, _norm(findings[0].get("message")) if findings else "", 120),
         "stats": {
             "chars": chars,
             "target_words": target_words,
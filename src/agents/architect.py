@@ -1,19 +1,32 @@
 from __future__ import annotations
 
-import json
-from typing import Any, Dict
-
 from state import StoryState
-from debug_log import truncate_text
-from json_utils import extract_first_json_object
-from llm_meta import extract_finish_reason_and_usage
-from llm_call import invoke_with_retry
 from llm_json import invoke_json_with_repair
+from planner_tasks import planner_task_instruction
+
+
+_SCHEMA_TEXT = (
+    "{\n"
+    '  "rules": [{"name":"string","desc":"string"}],\n'
+    '  "factions": [{"name":"string","desc":"string"}],\n'
+    '  "places": [{"name":"string","desc":"string"}],\n'
+    '  "notes": "string"\n'
+    "}\n"
+)
 
+# 系统提示词模板（模块级常量，调用时只做 format）
+_SYSTEM_TMPL = (
+    "你是小说项目的“架构师”，负责构建世界观设定。\n"
+    "你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown、不要多余文字）。\n"
+    "输出 JSON schema（字段允许为空，但必须是合法 JSON）：\n"
+    + _SCHEMA_TEXT.replace("{", "{{").replace("}", "}}")
+    + "要求：\n"
+    "- rules/factions/places 每类 3~8 条，尽量具体可用于写作约束。\n"
+    "- notes 用于补充“世界规则/禁忌/核心冲突”的一句话摘要。\n"
+    "- 本次项目规模：总章数={chapters_total}；每章目标字数≈{target_words}（中文字符数近似）。请按规模控制设定密度：长篇需留出可扩展空间与多阶段冲突升级。\n"
+)
 
-def _extract(text: str) -> Dict[str, Any]:
-    obj = extract_first_json_object(text)
-    return obj if isinstance(obj, dict) else {}
+_HUMAN_TMPL = "项目：{project_name}\n点子：{idea}\n章节数：{chapters_total}\n每章目标字数：{target_words}\n"
 
 
 def architect_agent(state: StoryState) -> StoryState:
@@ -29,24 +42,9 @@ def architect_agent(state: StoryState) -> StoryState:
     chapters_total = int(state.get("chapters_total", 1) or 1)
     target_words = int(state.get("target_words", 800) or 800)
     planner_result = state.get("planner_result") or {}
-    project_name = ""
-    try:
-        project_name = str(planner_result.get("项目名称", "") or "")
-    except Exception:
-        project_name = ""
+    project_name = str(planner_result.get("项目名称", "") or "") if isinstance(planner_result, dict) else ""
 
-    instr = ""
-    try:
-        tasks = planner_result.get("任务列表") if isinstance(planner_result, dict) else []
-        if isinstance(tasks, list):
-            for t in tasks:
-                if not isinstance(t, dict):
-                    continue
-                if str(t.get("任务名称", "") or "").strip() == "世界观设定":
-                    instr = str(t.get("任务指令", "") or "").strip()
-                    break
-    except Exception:
-        instr = ""
+    instr = planner_task_instruction(planner_result, "世界观设定")
 
     llm = state.get("llm")
     if llm:
@@ -58,75 +56,28 @@ def architect_agent(state: StoryState) -> StoryState:
             llm = None
 
     if llm:
-        def _invoke_once(node_name: str, system_msg: SystemMessage, human_msg: HumanMessage):
-            if logger:
-                model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
-                with logger.llm_call(
-                    node=node_name,
-                    chapter_index=0,
-                    messages=[system_msg, human_msg],
-                    model=model,
-                    base_url=str(getattr(llm, "base_url", "") or ""),
-                ):
-                    return invoke_with_retry(
-                        llm,
-                        [system_msg, human_msg],
-                        max_attempts=int(state.get("llm_max_attempts", 3) or 3),
-                        base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
-                        logger=logger,
-                        node=node_name,
-                        chapter_index=0,
-                    )
-            return invoke_with_retry(
-                llm,
-                [system_msg, human_msg],
-                max_attempts=int(state.get("llm_max_attempts", 3) or 3),
-                base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
-            )
-
-        system = SystemMessage(
-            content=(
-                "你是小说项目的“架构师”，负责构建世界观设定。\n"
-                "你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown、不要多余文字）。\n"
-                "输出 JSON schema（字段允许为空，但必须是合法 JSON）：\n"
-                "{\n"
-                '  "rules": [{"name":"string","desc":"string"}],\n'
-                '  "factions": [{"name":"string","desc":"string"}],\n'
-                '  "places": [{"name":"string","desc":"string"}],\n'
-                '  "notes": "string"\n'
-                "}\n"
-                "要求：\n"
-                "- rules/factions/places 每类 3~8 条，尽量具体可用于写作约束。\n"
-                "- notes 用于补充“世界规则/禁忌/核心冲突”的一句话摘要。\n"
-                f"- 本次项目规模：总章数={chapters_total}；每章目标字数≈{target_words}（中文字符数近似）。请按规模控制设定密度：长篇需留出可扩展空间与多阶段冲突升级。\n"
-            )
-        )
+        system = SystemMessage(content=_SYSTEM_TMPL.format(chapters_total=chapters_total, target_words=target_words))
         human = HumanMessage(
             content=(
-                f"项目：{project_name}\n"
-                f"点子：{idea}\n"
-                f"章节数：{chapters_total}\n"
-                f"每章目标字数：{target_words}\n"
+                _HUMAN_TMPL.format(
+                    project_name=project_name,
+                    idea=idea,
+                    chapters_total=chapters_total,
+                    target_words=target_words,
+                )
                 + (f"\n策划任务书（世界观设定）：\n{instr}\n" if instr else "")
             )
         )
-        schema_text = (
-            "{\n"
-            '  "rules": [{"name":"string","desc":"string"}],\n'
-            '  "factions": [{"name":"string","desc":"string"}],\n'
-            '  "places": [{"name":"string","desc":"string"}],\n'
-            '  "notes": "string"\n'
-            "}\n"
-        )
         obj, _raw, _fr0, _usage0 = invoke_json_with_repair(
             llm=llm,
             messages=[system, human],
-            schema_text=schema_text,
+            schema_text=_SCHEMA_TEXT,
             node="architect",
             chapter_index=0,
             logger=logger,
             max_attempts=int(state.get("llm_max_attempts", 3) or 3),
             base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
+            stream=True,
         )
 
         # 若仍失败：auto 模式降级为模板；force_llm 则抛错
@@ -1,44 +1,142 @@
 from __future__ import annotations
 
-import json
 import re
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Tuple
 
 from state import StoryState
 from debug_log import truncate_text
 import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 
-from storage import load_canon_bundle, read_json, write_json, write_text
-from llm_meta import extract_finish_reason_and_usage
+from storage import load_canon_bundle, write_json_batch
+from llm_meta import extract_finish_reason_and_usage, llm_identity
 from json_utils import extract_first_json_object
 from json_utils import extract_first_json_object_with_error
 from llm_call import invoke_with_retry
 from llm_json import repair_json_only
+from planner_tasks import planner_result_text
+
+try:
+    # 导入一次即可；缺依赖时退回模板兜底（与原先函数内 try/except 的行为一致）
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    _HAS_LC = True
+except Exception:  # pragma: no cover
+    SystemMessage = HumanMessage = None  # type: ignore[assignment,misc]
+    _HAS_LC = False
+
+
+# 输出结构简写（比逐字回显 JSON 示例省大量 token）；主调用、重试与 JSON 修复共用
+_SCHEMA_SHORT = (
+    "（记法：x[] 为数组，{a,b} 为对象字段，未标类型的字段均为 string）\n"
+    "world:{rules[]:{name,detail}, factions[]:{name,detail}, places[]:{name,detail}, notes}\n"
+    "characters:{characters[]:{name,role,personality,motivation,abilities,taboos,relationships[]:{with,relation}}}\n"
+    "timeline:{events[]:{order:int,when,what,impact}}\n"
+    "style_suggestions\n"
+)
+
+# 主调用 system 提示词
+_SYSTEM_TEXT = (
+    "你是小说项目的“设定初始化器”。你将基于用户一句话点子与策划任务书，产出第一版可执行设定（Canon）。\n"
+    "你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown）。\n"
+    "输出 JSON schema（简写）：\n"
+    + _SCHEMA_SHORT
+    + "要求：\n"
+    "- world/characters/timeline 必须可落盘直接用；避免空数组。\n"
+    "- 不要过度发散：控制在 6-12 条规则/事件量级。\n"
+    "- 设定要服务写作：包含可用于制造冲突的规则与人物动机。\n"
+)
+
+# 截断/解析失败时的“更短、更保守”重试提示词
+_RETRY_SYSTEM_CONTENT = (
+    "你是小说项目的“设定初始化器”。你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown）。\n"
+    "务必短：控制总条目数与字段长度，确保 JSON 完整可解析。\n"
+    "硬性约束：\n"
+    "- world.rules 6条以内\n"
+    "- world.factions 3条以内\n"
+    "- world.places 3条以内\n"
+    "- characters.characters 3个角色以内\n"
+    "- timeline.events 6条以内\n"
+    "- 每个 detail 不超过 120 字\n"
+    "- style_suggestions 不超过 180 字\n"
+    "输出 JSON schema 与上一次相同。\n"
+)
+
+# system 提示词是静态的：消息对象只构建一次，各次调用共用（invoke 不会修改传入的消息）
+_CANON_SYSTEM_MSG = SystemMessage(content=_SYSTEM_TEXT) if _HAS_LC else None
+_CANON_RETRY_SYSTEM_MSG = SystemMessage(content=_RETRY_SYSTEM_CONTENT) if _HAS_LC else None
+
+# planner_result 注入 prompt 的字符上限（只需要方向性信息，过长只会拖慢/加价 LLM 调用）
+_PLANNER_MAX_CHARS = 4000
+
+# canon_init_hedge：主调用超过该时长仍未返回，就并发发出保守重试（对冲请求）；可由 canon_init_hedge_delay_s 覆盖
+_HEDGE_DELAY_S = 30.0
+
+
+# 最小可用模板（LLM 两次失败 / 无 LLM 时兜底落盘）；write_json_batch 只序列化不修改，可直接共用
+_FALLBACK_WORLD: Dict[str, Any] = {
+    "rules": [{"name": "修行体系", "detail": "世界存在修行体系，但细节待补充；不同宗门/势力有不同法门。"}],
+    "factions": [{"name": "宗门A", "detail": "本地强势宗门，内部派系斗争激烈。"}],
+    "places": [{"name": "山门", "detail": "故事开篇发生地，规矩森严。"}],
+    "notes": "（模板）后续由架构师完善世界观规则/禁忌/体系。",
+}
+_FALLBACK_CHARS: Dict[str, Any] = {
+    "characters": [
+        {
+            "name": "主角",
+            "role": "外来者/新入门者",
+            "personality": "谨慎、好奇、有底线",
+            "motivation": "求生与自证",
+            "abilities": "未知（待觉醒）",
+            "taboos": "不要轻易暴露秘密",
+            "relationships": [],
+        }
+    ]
+}
+_FALLBACK_TIMELINE: Dict[str, Any] = {
+    "events": [{"order": 1, "when": "开篇", "what": "主角误入修仙世界并被宗门注意", "impact": "被迫卷入宗门纷争"}]
+}
+
+
+def _fallback_items(
+    need_world: bool,
+    need_chars: bool,
+    need_timeline: bool,
+    world_path: str,
+    characters_path: str,
+    timeline_path: str,
+) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    需要兜底的 canon 文件 -> [(path, 模板)]；style.md 不在此处兜底写入。
+    """
+    items: List[Tuple[str, Dict[str, Any]]] = []
+    if need_world:
+        items.append((world_path, _FALLBACK_WORLD))
+    if need_chars:
+        items.append((characters_path, _FALLBACK_CHARS))
+    if need_timeline:
+        items.append((timeline_path, _FALLBACK_TIMELINE))
+    return items
 
 
-def _is_placeholder_world(world: Dict[str, Any]) -> bool:
-    if not isinstance(world, dict):
-        return True
-    return (
-        (world.get("rules") in (None, [], ""))  # type: ignore[comparison-overlap]
-        and (world.get("factions") in (None, [], ""))
-        and (world.get("places") in (None, [], ""))
-        and (str(world.get("notes", "") or "").strip() == "")
-    )
-
-
-def _is_placeholder_characters(characters: Dict[str, Any]) -> bool:
-    if not isinstance(characters, dict):
-        return True
-    arr = characters.get("characters")
-    return not isinstance(arr, list) or len(arr) == 0
-
-
-def _is_placeholder_timeline(timeline: Dict[str, Any]) -> bool:
-    if not isinstance(timeline, dict):
-        return True
-    arr = timeline.get("events")
-    return not isinstance(arr, list) or len(arr) == 0
+def _canon_needs(world: Any, characters: Any, timeline: Any) -> Tuple[bool, bool, bool]:
+    """
+    一次性判断 world/characters/timeline 是否仍为占位（需要初始化）。
+    返回：(need_world, need_chars, need_timeline)
+    """
+    if isinstance(world, dict):
+        notes = world.get("notes")
+        need_world = not (
+            world.get("rules") or world.get("factions") or world.get("places") or (notes and str(notes).strip())
+        )
+    else:
+        need_world = True
+    arr = characters.get("characters") if isinstance(characters, dict) else None
+    need_chars = not (isinstance(arr, list) and arr)
+    evs = timeline.get("events") if isinstance(timeline, dict) else None
+    need_timeline = not (isinstance(evs, list) and evs)
+    return need_world, need_chars, need_timeline
 
 
 def _merge_keep_existing(existing: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
@@ -46,9 +144,13 @@ def _merge_keep_existing(existing: Dict[str, Any], new: Dict[str, Any]) -> Dict[
     轻量合并：existing 有值则保留；否则用 new。
     仅做一层 dict 合并，避免复杂冲突处理（后续由专门的设定更新器/主编来做）。
     """
-    out = dict(existing or {})
+    if not existing:
+        # 首次初始化的常见情况：没有已有内容可保留，直接用 new
+        return new or {}
+    out = dict(existing)
     for k, v in (new or {}).items():
-        if k not in out or out.get(k) in (None, "", [], {}):
+        # canon 字段都是 str/list/dict：缺失与空值统一按真值判断
+        if not out.get(k):
             out[k] = v
     return out
 
@@ -66,6 +168,10 @@ def canon_init_agent(state: StoryState) -> StoryState:
     - 无 LLM：写入最小可用模板（保证后续流程能注入到 prompt）
     """
     logger = state.get("logger")
+    # 日志关闭时直接当作没有 logger：后续各处 logger.event 的参数都不必再拼装
+    if logger and hasattr(logger, "enabled_for") and not logger.enabled_for("canon_init"):
+        logger = None
+    max_chars = int(getattr(logger, "max_chars", 20000) or 20000)
     chapter_index = int(state.get("chapter_index", 0) or 0)
     if logger:
         logger.event("node_start", node="canon_init", chapter_index=chapter_index)
@@ -84,19 +190,17 @@ def canon_init_agent(state: StoryState) -> StoryState:
     # style.md 不在此处兜底生成：必须来自用户输入（由主流程负责创建/校验）
     style_path = os.path.join(canon_dir, "style.md")
 
-    existing_world = read_json(world_path) or {}
-    existing_characters = read_json(characters_path) or {}
-    existing_timeline = read_json(timeline_path) or {}
-    existing_style = ""
+    # load_canon_bundle 已读取 world/characters/timeline/style：只读一遍盘，不再逐个 read_json
     try:
         bundle = load_canon_bundle(project_dir)
-        existing_style = str(bundle.get("style", "") or "")
     except Exception:
-        existing_style = ""
+        bundle = {}
+    existing_world = bundle.get("world") or {}
+    existing_characters = bundle.get("characters") or {}
+    existing_timeline = bundle.get("timeline") or {}
+    existing_style = str(bundle.get("style", "") or "")
 
-    need_world = _is_placeholder_world(existing_world)
-    need_chars = _is_placeholder_characters(existing_characters)
-    need_timeline = _is_placeholder_timeline(existing_timeline)
+    need_world, need_chars, need_timeline = _canon_needs(existing_world, existing_characters, existing_timeline)
     # 注意：style.md 必须来自用户输入；canon_init 不负责生成/覆盖 style
     need_style = not existing_style.strip()
 
@@ -110,46 +214,27 @@ def canon_init_agent(state: StoryState) -> StoryState:
     planner_result = state.get("planner_result") or {}
 
     llm = state.get("llm")
-    if llm:
-        try:
-            from langchain_core.messages import SystemMessage, HumanMessage
-        except Exception:
-            llm = None
+    if llm and not _HAS_LC:
+        llm = None
 
     if llm:
-        system = SystemMessage(
-            content=(
-                "你是小说项目的“设定初始化器”。你将基于用户一句话点子与策划任务书，产出第一版可执行设定（Canon）。\n"
-                "你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown）。\n"
-                "输出 JSON schema：\n"
-                "{\n"
-                '  "world": {"rules":[{"name":"string","detail":"string"}], "factions":[{"name":"string","detail":"string"}], "places":[{"name":"string","detail":"string"}], "notes":"string"},\n'
-                '  "characters": {"characters":[{"name":"string","role":"string","personality":"string","motivation":"string","abilities":"string","taboos":"string","relationships":[{"with":"string","relation":"string"}]}]},\n'
-                '  "timeline": {"events":[{"order":1,"when":"string","what":"string","impact":"string"}]},\n'
-                '  "style_suggestions": "string"\n'
-                "}\n"
-                "要求：\n"
-                "- world/characters/timeline 必须可落盘直接用；避免空数组。\n"
-                "- 不要过度发散：控制在 6-12 条规则/事件量级。\n"
-                "- 设定要服务写作：包含可用于制造冲突的规则与人物动机。\n"
-            )
-        )
+        system = _CANON_SYSTEM_MSG
         human = HumanMessage(
             content=(
                 f"用户点子：{idea}\n\n"
-                f"策划任务书（planner_result）：{planner_result}\n\n"
+                f"策划任务书（planner_result）：{planner_result_text(planner_result, max_chars=_PLANNER_MAX_CHARS)}\n\n"
                 "注意：这是第一版设定，后续会由架构师/角色导演持续维护。请给出稳健、可扩展的基础设定。"
             )
         )
         def _invoke_once(node_name: str, system_msg: SystemMessage, human_msg: HumanMessage) -> tuple[str, str | None]:
             if logger:
-                model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+                model, base_url = llm_identity(llm)
                 with logger.llm_call(
                     node=node_name,
                     chapter_index=chapter_index,
                     messages=[system_msg, human_msg],
                     model=model,
-                    base_url=str(getattr(llm, "base_url", "") or ""),
+                    base_url=base_url,
                 ):
                     resp0 = invoke_with_retry(
                         llm,
@@ -174,90 +259,85 @@ def canon_init_agent(state: StoryState) -> StoryState:
                     "llm_response",
                     node=node_name,
                     chapter_index=chapter_index,
-                    content=truncate_text(text0, max_chars=getattr(logger, "max_chars", 20000)),
+                    content=truncate_text(text0, max_chars=max_chars),
                     finish_reason=fr0,
                     token_usage=usage0,
                 )
             return text0, fr0
 
-        # 第一次尝试
-        text, fr = _invoke_once("canon_init", system, human)
-        obj, err = extract_first_json_object_with_error(text)
-
-        # 如果不是 length，而是明确解析错误：立刻把错误原因回传给 LLM 做 JSON 修复（更“解决问题”）
-        if (not obj) and (not (fr and str(fr).lower() == "length")):
-            try:
-                schema_text = (
-                    "{\n"
-                    '  "world": {"rules":[{"name":"string","detail":"string"}], "factions":[{"name":"string","detail":"string"}], "places":[{"name":"string","detail":"string"}], "notes":"string"},\n'
-                    '  "characters": {"characters":[{"name":"string","role":"string","personality":"string","motivation":"string","abilities":"string","taboos":"string","relationships":[{"with":"string","relation":"string"}]}]},\n'
-                    '  "timeline": {"events":[{"order":1,"when":"string","what":"string","impact":"string"}]},\n'
-                    '  "style_suggestions": "string"\n'
-                    "}\n"
-                )
-                obj_fix = repair_json_only(
-                    llm=llm,
-                    bad_text=text,
-                    err=err or "unknown_parse_error",
-                    schema_text=schema_text,
-                    node="canon_init_fix_json",
-                    chapter_index=chapter_index,
-                    logger=logger,
-                    max_attempts=int(state.get("llm_max_attempts", 3) or 3),
-                    base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
-                )
-                if obj_fix:
-                    obj, err = obj_fix, ""
-            except Exception:
-                pass
-
-        # 如果被截断 / 解析失败：做一次更短、更保守的重试，避免 writer/editor 拿到空 Canon 导致通过率极低
-        if (not obj) or (fr and str(fr).lower() == "length"):
-            system_retry = SystemMessage(
-                content=(
-                    "你是小说项目的“设定初始化器”。你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown）。\n"
-                    "务必短：控制总条目数与字段长度，确保 JSON 完整可解析。\n"
-                    "硬性约束：\n"
-                    "- world.rules 6条以内\n"
-                    "- world.factions 3条以内\n"
-                    "- world.places 3条以内\n"
-                    "- characters.characters 3个角色以内\n"
-                    "- timeline.events 6条以内\n"
-                    "- 每个 detail 不超过 120 字\n"
-                    "- style_suggestions 不超过 180 字\n"
-                    "输出 JSON schema 与上一次相同。\n"
-                )
-            )
-            text2, _fr2 = _invoke_once("canon_init_retry", system_retry, human)
-            obj2, err2 = extract_first_json_object_with_error(text2)
-            if obj2:
-                obj, err = obj2, ""
+        # 保守重试提示词（对冲模式下会提前并发发出）
+        system_retry = _CANON_RETRY_SYSTEM_MSG
+
+        # 第一次尝试；canon_init_hedge 开启时，主调用超过 canon_init_hedge_delay_s 未返回就并发发出保守重试，
+        # 主调用失败/被截断时直接用在途结果，省掉一次串行往返（代价：可能多一次 LLM 调用）
+        retry_future = None
+        pool = ThreadPoolExecutor(max_workers=2) if state.get("canon_init_hedge") else None
+        hedge_delay_s = float(state.get("canon_init_hedge_delay_s", _HEDGE_DELAY_S) or _HEDGE_DELAY_S)
+        try:
+            if pool is not None:
+                primary_future = pool.submit(_invoke_once, "canon_init", system, human)
+                try:
+                    text, fr = primary_future.result(timeout=hedge_delay_s)
+                except FuturesTimeoutError:
+                    retry_future = pool.submit(_invoke_once, "canon_init_retry", system_retry, human)
+                    text, fr = primary_future.result()
             else:
-                # 再把解析错误回传给 LLM，做一次针对性 JSON 修复
+                text, fr = _invoke_once("canon_init", system, human)
+            obj, err = extract_first_json_object_with_error(text)
+
+            # 如果不是 length，而是明确解析错误：立刻把错误原因回传给 LLM 做 JSON 修复（更“解决问题”）
+            # 对冲重试已在途时直接等它，不再额外做一次修复调用
+            if (not obj) and (not (fr and str(fr).lower() == "length")) and retry_future is None:
                 try:
-                    schema_text = (
-                        "{\n"
-                        '  "world": {"rules":[{"name":"string","detail":"string"}], "factions":[{"name":"string","detail":"string"}], "places":[{"name":"string","detail":"string"}], "notes":"string"},\n'
-                        '  "characters": {"characters":[{"name":"string","role":"string","personality":"string","motivation":"string","abilities":"string","taboos":"string","relationships":[{"with":"string","relation":"string"}]}]},\n'
-                        '  "timeline": {"events":[{"order":1,"when":"string","what":"string","impact":"string"}]},\n'
-                        '  "style_suggestions": "string"\n'
-                        "}\n"
-                    )
-                    obj_fix2 = repair_json_only(
+                    obj_fix = repair_json_only(
                         llm=llm,
-                        bad_text=text2,
-                        err=err2 or err or "unknown_parse_error",
-                        schema_text=schema_text,
-                        node="canon_init_retry_fix_json",
+                        bad_text=text,
+                        err=err or "unknown_parse_error",
+                        schema_text=_SCHEMA_SHORT,
+                        node="canon_init_fix_json",
                         chapter_index=chapter_index,
                         logger=logger,
                         max_attempts=int(state.get("llm_max_attempts", 3) or 3),
                         base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
                     )
-                    if obj_fix2:
-                        obj = obj_fix2
+                    if obj_fix:
+                        obj, err = obj_fix, ""
                 except Exception:
                     pass
+
+            # 如果被截断 / 解析失败：做一次更短、更保守的重试，避免 writer/editor 拿到空 Canon 导致通过率极低
+            if (not obj) or (fr and str(fr).lower() == "length"):
+                if retry_future is not None:
+                    text2, _fr2 = retry_future.result()
+                else:
+                    text2, _fr2 = _invoke_once("canon_init_retry", system_retry, human)
+                obj2, err2 = extract_first_json_object_with_error(text2)
+                if obj2:
+                    obj, err = obj2, ""
+                else:
+                    # 再把解析错误回传给 LLM，做一次针对性 JSON 修复
+                    try:
+                        obj_fix2 = repair_json_only(
+                            llm=llm,
+                            bad_text=text2,
+                            err=err2 or err or "unknown_parse_error",
+                            schema_text=_SCHEMA_SHORT,
+                            node="canon_init_retry_fix_json",
+                            chapter_index=chapter_index,
+                            logger=logger,
+                            max_attempts=int(state.get("llm_max_attempts", 3) or 3),
+                            base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
+                        )
+                        if obj_fix2:
+                            obj = obj_fix2
+                    except Exception:
+                        pass
+        finally:
+            if pool is not None:
+                # 主调用已成功时不等待在途的对冲请求；已在运行的请求无法取消，会跑完（并计费），这里记录下来
+                if retry_future is not None and not retry_future.done() and logger:
+                    logger.event("canon_init_hedge_abandoned", node="canon_init", chapter_index=chapter_index)
+                pool.shutdown(wait=False, cancel_futures=True)
         new_world = obj.get("world") if isinstance(obj.get("world"), dict) else {}
         new_chars = obj.get("characters") if isinstance(obj.get("characters"), dict) else {}
         new_timeline = obj.get("timeline") if isinstance(obj.get("timeline"), dict) else {}
@@ -266,39 +346,9 @@ def canon_init_agent(state: StoryState) -> StoryState:
 
         # 若两次仍失败：立刻写入“最小可用模板”，避免 writer/editor 拿到空 Canon 导致通过率极低
         if not (new_world or new_chars or new_timeline or style_suggestions.strip()):
-            if need_world:
-                write_json(
-                    world_path,
-                    {
-                        "rules": [{"name": "修行体系", "detail": "世界存在修行体系，但细节待补充；不同宗门/势力有不同法门。"}],
-                        "factions": [{"name": "宗门A", "detail": "本地强势宗门，内部派系斗争激烈。"}],
-                        "places": [{"name": "山门", "detail": "故事开篇发生地，规矩森严。"}],
-                        "notes": "（模板）后续由架构师完善世界观规则/禁忌/体系。",
-                    },
-                )
-            if need_chars:
-                write_json(
-                    characters_path,
-                    {
-                        "characters": [
-                            {
-                                "name": "主角",
-                                "role": "外来者/新入门者",
-                                "personality": "谨慎、好奇、有底线",
-                                "motivation": "求生与自证",
-                                "abilities": "未知（待觉醒）",
-                                "taboos": "不要轻易暴露秘密",
-                                "relationships": [],
-                            }
-                        ]
-                    },
-                )
-            if need_timeline:
-                write_json(
-                    timeline_path,
-                    {"events": [{"order": 1, "when": "开篇", "what": "主角误入修仙世界并被宗门注意", "impact": "被迫卷入宗门纷争"}]},
-                )
+            pending = _fallback_items(need_world, need_chars, need_timeline, world_path, characters_path, timeline_path)
             # style.md 不在此处兜底写入
+            write_json_batch(pending)
 
             if logger:
                 logger.event(
@@ -320,16 +370,18 @@ def canon_init_agent(state: StoryState) -> StoryState:
         wrote_timeline = False
         wrote_style = False
 
+        pending = []
         if need_world and isinstance(new_world, dict) and new_world:
-            write_json(world_path, _merge_keep_existing(existing_world, new_world))
+            pending.append((world_path, _merge_keep_existing(existing_world, new_world)))
             wrote_world = True
         if need_chars and isinstance(new_chars, dict) and new_chars:
-            write_json(characters_path, _merge_keep_existing(existing_characters, new_chars))
+            pending.append((characters_path, _merge_keep_existing(existing_characters, new_chars)))
             wrote_characters = True
         if need_timeline and isinstance(new_timeline, dict) and new_timeline:
-            write_json(timeline_path, _merge_keep_existing(existing_timeline, new_timeline))
+            pending.append((timeline_path, _merge_keep_existing(existing_timeline, new_timeline)))
             wrote_timeline = True
         # style.md 不在此处写入（必须来自用户输入）
+        write_json_batch(pending)
 
         if logger:
             logger.event(
@@ -346,43 +398,9 @@ def canon_init_agent(state: StoryState) -> StoryState:
         return state
 
     # 模板兜底：写入最小可用结构（不追求质量，只保证后续可注入/可维护）
-    if need_world:
-        write_json(
-            world_path,
-            {
-                "rules": [{"name": "修行体系", "detail": "世界存在修行体系，但细节待补充；不同宗门/势力有不同法门。"}],
-                "factions": [{"name": "宗门A", "detail": "本地强势宗门，内部派系斗争激烈。"}],
-                "places": [{"name": "山门", "detail": "故事开篇发生地，规矩森严。"}],
-                "notes": "（模板）后续由架构师完善世界观规则/禁忌/体系。",
-            },
-        )
-    if need_chars:
-        write_json(
-            characters_path,
-            {
-                "characters": [
-                    {
-                        "name": "主角",
-                        "role": "外来者/新入门者",
-                        "personality": "谨慎、好奇、有底线",
-                        "motivation": "求生与自证",
-                        "abilities": "未知（待觉醒）",
-                        "taboos": "不要轻易暴露秘密",
-                        "relationships": [],
-                    }
-                ]
-            },
-        )
-    if need_timeline:
-        write_json(
-            timeline_path,
-            {
-                "events": [
-                    {"order": 1, "when": "开篇", "what": "主角误入修仙世界并被宗门注意", "impact": "被迫卷入宗门纷争"}
-                ]
-            },
-        )
+    pending = _fallback_items(need_world, need_chars, need_timeline, world_path, characters_path, timeline_path)
     # style.md 不在此处兜底写入
+    write_json_batch(pending)
 
     state["canon_init_used_llm"] = False
     if logger:
@@ -1,8 +1,53 @@
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Tuple
 
 from state import StoryState
+from debug_log import event_sink
+
+
+def _iter_facts(new_facts: Any) -> Iterator[Tuple[str, str, str]]:
+    """
+    chapter memory 的 new_facts -> (type, key, value)；三者缺一则跳过。
+    """
+    for it in new_facts if isinstance(new_facts, list) else ():
+        if not isinstance(it, dict):
+            continue
+        t = str(it.get("type") or "").strip()
+        if not t:
+            continue
+        k = str(it.get("key") or "").strip()
+        if not k:
+            continue
+        v = str(it.get("value") or "").strip()
+        if v:
+            yield t, k, v
+
+
+def _iter_character_updates(cu: Any) -> Iterator[Tuple[str, str, str]]:
+    """
+    chapter memory 的 character_updates -> (name, status, new_info)；需有 name 且 status/new_info 至少一项。
+    """
+    for it in cu if isinstance(cu, list) else ():
+        if not isinstance(it, dict):
+            continue
+        name = str(it.get("name") or "").strip()
+        if not name:
+            continue
+        status = str(it.get("status") or "").strip()
+        new_info = str(it.get("new_info") or "").strip()
+        if status or new_info:
+            yield name, status, new_info
+
+
+def _iter_style_notes(style_notes: Any) -> Iterator[str]:
+    """
+    chapter memory 的 style_notes -> 去空白后的非空条目。
+    """
+    for x in style_notes if isinstance(style_notes, list) else ():
+        s = str(x).strip()
+        if s:
+            yield s
 
 
 def canon_update_agent(state: StoryState) -> StoryState:
@@ -14,9 +59,9 @@ def canon_update_agent(state: StoryState) -> StoryState:
     - 建议落盘后，必须由用户通过 CLI “预览→确认→应用” 才会真正写入 Canon
     """
     logger = state.get("logger")
+    log_event = event_sink(logger)
     chapter_index = int(state.get("chapter_index", 1))
-    if logger:
-        logger.event("node_start", node="canon_update", chapter_index=chapter_index)
+    log_event("node_start", node="canon_update", chapter_index=chapter_index)
 
     # 注意：canon_update_suggestions 是“建议层”，不直接修改 Canon；
     # 为了保持落盘章节的一致性（即使审核不通过/达到返工上限），此处不再以 editor_decision 作为门控条件。
@@ -28,16 +73,24 @@ def canon_update_agent(state: StoryState) -> StoryState:
     if not project_dir:
         state["canon_update_used"] = False
         state["canon_update_suggestions"] = []
-        if logger:
-            logger.event("node_end", node="canon_update", chapter_index=chapter_index, skipped=True, reason="missing_project_dir")
+        log_event("node_end", node="canon_update", chapter_index=chapter_index, skipped=True, reason="missing_project_dir")
         return state
 
     mem = state.get("chapter_memory") or {}
     if not isinstance(mem, dict) or not mem:
         state["canon_update_used"] = False
         state["canon_update_suggestions"] = []
-        if logger:
-            logger.event("node_end", node="canon_update", chapter_index=chapter_index, skipped=True, reason="missing_chapter_memory")
+        log_event("node_end", node="canon_update", chapter_index=chapter_index, skipped=True, reason="missing_chapter_memory")
+        return state
+
+    # 三类可沉淀内容都为空：没有可生成的建议，直接跳过
+    new_facts = mem.get("new_facts")
+    cu = mem.get("character_updates")
+    style_notes = mem.get("style_notes")
+    if not (new_facts or cu or style_notes):
+        state["canon_update_used"] = False
+        state["canon_update_suggestions"] = []
+        log_event("node_end", node="canon_update", chapter_index=chapter_index, skipped=True, reason="empty_memory")
         return state
 
     # 生成建议（统一复用 apply_canon_suggestions 支持的最保守 op：note / append）
@@ -49,93 +102,75 @@ def canon_update_agent(state: StoryState) -> StoryState:
     if (not approved) and (not bool(state.get("allow_unapproved_updates", False))):
         state["canon_update_used"] = False
         state["canon_update_suggestions"] = []
-        if logger:
-            logger.event("node_end", node="canon_update", chapter_index=chapter_index, skipped=True, reason="not_approved")
+        log_event("node_end", node="canon_update", chapter_index=chapter_index, skipped=True, reason="not_approved")
         return state
 
+    # 各条建议共用的公共字段（每条用 {**base, ...} 展开）
+    base = {
+        "source": "memory",
+        "chapter_index": chapter_index,
+        "editor_decision": editor_decision,
+        "approved": approved,
+        "action": "canon_patch",
+    }
+    chapter_tag = f"[第{chapter_index}章]"
+
     # 1) new_facts：写入 world.json notes（最安全，避免 schema/定位复杂）
-    new_facts = mem.get("new_facts") if isinstance(mem.get("new_facts"), list) else []
-    for it in new_facts:
-        if not isinstance(it, dict):
-            continue
-        t = str(it.get("type", "") or "").strip()
-        k = str(it.get("key", "") or "").strip()
-        v = str(it.get("value", "") or "").strip()
-        if not (t and k and v):
-            continue
-        line = f"[第{chapter_index}章][{t}] {k}：{v}"
-        suggestions.append(
-            {
-                "source": "memory",
-                "chapter_index": chapter_index,
-                "editor_decision": editor_decision,
-                "approved": approved,
-                "action": "canon_patch",
-                "issue": f"沉淀 chapter memory 的 new_facts 到 Canon（{t}）",
-                "quote": "",
-                "type": "world",
-                "canon_key": "world.notes",
-                "fix": "追加到 world.notes，供后续人工结构化整理",
-                "canon_patch": {"target": "world.json", "op": "note", "path": "notes", "value": line},
-            }
-        )
+    suggestions.extend(
+        {
+            **base,
+            "issue": f"沉淀 chapter memory 的 new_facts 到 Canon（{t}）",
+            "quote": "",
+            "type": "world",
+            "canon_key": "world.notes",
+            "fix": "追加到 world.notes，供后续人工结构化整理",
+            "canon_patch": {"target": "world.json", "op": "note", "path": "notes", "value": f"{chapter_tag}[{t}] {k}：{v}"},
+        }
+        for t, k, v in _iter_facts(new_facts)
+    )
 
     # 2) character_updates：同样先写入 world.notes（避免直接改人物卡导致误伤）
-    cu = mem.get("character_updates") if isinstance(mem.get("character_updates"), list) else []
-    for it in cu:
-        if not isinstance(it, dict):
-            continue
-        name = str(it.get("name", "") or "").strip()
-        status = str(it.get("status", "") or "").strip()
-        new_info = str(it.get("new_info", "") or "").strip()
-        if not name or (not status and not new_info):
-            continue
-        line = f"[第{chapter_index}章][角色更新] {name}：{status}；{new_info}".strip("； ").strip()
-        suggestions.append(
-            {
-                "source": "memory",
-                "chapter_index": chapter_index,
-                "editor_decision": editor_decision,
-                "approved": approved,
-                "action": "canon_patch",
-                "issue": "沉淀角色状态变更到 Canon（先记 notes，后续可再结构化进人物卡）",
-                "quote": "",
-                "type": "character",
-                "canon_key": "world.notes",
-                "fix": "追加到 world.notes",
-                "canon_patch": {"target": "world.json", "op": "note", "path": "notes", "value": line},
-            }
-        )
+    suggestions.extend(
+        {
+            **base,
+            "issue": "沉淀角色状态变更到 Canon（先记 notes，后续可再结构化进人物卡）",
+            "quote": "",
+            "type": "character",
+            "canon_key": "world.notes",
+            "fix": "追加到 world.notes",
+            "canon_patch": {
+                "target": "world.json",
+                "op": "note",
+                "path": "notes",
+                "value": f"{chapter_tag}[角色更新] {name}：{status}；{new_info}".strip("； ").strip(),
+            },
+        }
+        for name, status, new_info in _iter_character_updates(cu)
+    )
 
     # 3) style_notes：追加到 style.md
-    style_notes = mem.get("style_notes") if isinstance(mem.get("style_notes"), list) else []
-    for s in [str(x).strip() for x in style_notes if str(x).strip()]:
-        suggestions.append(
-            {
-                "source": "memory",
-                "chapter_index": chapter_index,
-                "editor_decision": editor_decision,
-                "approved": approved,
-                "action": "canon_patch",
-                "issue": "沉淀文风要点到 style.md",
-                "quote": "",
-                "type": "style",
-                "canon_key": "style.md",
-                "fix": "追加 bullet 到 style.md",
-                "canon_patch": {"target": "style.md", "op": "append", "path": "N/A", "value": s},
-            }
-        )
+    suggestions.extend(
+        {
+            **base,
+            "issue": "沉淀文风要点到 style.md",
+            "quote": "",
+            "type": "style",
+            "canon_key": "style.md",
+            "fix": "追加 bullet 到 style.md",
+            "canon_patch": {"target": "style.md", "op": "append", "path": "N/A", "value": note},
+        }
+        for note in _iter_style_notes(style_notes)
+    )
 
     state["canon_update_suggestions"] = suggestions
     state["canon_update_used"] = bool(suggestions)
-    if logger:
-        logger.event(
-            "node_end",
-            node="canon_update",
-            chapter_index=chapter_index,
-            used=bool(state.get("canon_update_used", False)),
-            suggestions_count=len(suggestions),
-        )
+    log_event(
+        "node_end",
+        node="canon_update",
+        chapter_index=chapter_index,
+        used=bool(state.get("canon_update_used", False)),
+        suggestions_count=len(suggestions),
+    )
     return state
 
 
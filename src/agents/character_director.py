@@ -1,20 +1,111 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List
+import os
+from typing import Any, Dict, List, Tuple
 
 from state import StoryState
-from debug_log import truncate_text
-from json_utils import extract_first_json_object
-from llm_meta import extract_finish_reason_and_usage
-from storage import load_canon_bundle
-from llm_call import invoke_with_retry
+from debug_log import event_sink, truncate_text
+from storage import read_json
 from llm_json import invoke_json_with_repair
-
-
-def _extract(text: str) -> Dict[str, Any]:
-    obj = extract_first_json_object(text)
-    return obj if isinstance(obj, dict) else {}
+from planner_tasks import planner_task_instruction
+
+
+_SCHEMA_TEXT = (
+    "{\n"
+    '  "characters": [\n'
+    "    {\n"
+    '      "name": "string",\n'
+    '      "traits": ["string"],\n'
+    '      "motivation": "string",\n'
+    '      "background": "string",\n'
+    '      "abilities": ["string"],\n'
+    '      "taboos": ["string"],\n'
+    '      "relationships": ["string"],\n'
+    '      "notes": "string"\n'
+    "    }\n"
+    "  ]\n"
+    "}\n"
+)
+
+# 系统提示词模板（模块级常量，调用时只做 format）
+_SYSTEM_TMPL = (
+    "你是小说项目的“角色导演”，负责产出可执行的人物卡。\n"
+    "你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown、不要多余文字）。\n"
+    "输出 JSON schema（字段允许为空，但必须是合法 JSON）：\n"
+    + _SCHEMA_TEXT.replace("{", "{{").replace("}", "}}")
+    + "要求：\n"
+    "- 产出 3~6 个主要人物；每个角色必须有明确动机 + 1~3 个禁忌（便于写作一致性约束）。\n"
+    "- 若 Canon 已存在角色（同名），请只做“补全/增量”，不要改名、不要推翻既有条目。\n"
+    "- 本次项目规模：总章数={chapters_total}；每章目标字数≈{target_words}（中文字符数近似）。请按规模设计人物弧线：核心人物至少有 2~3 个阶段性变化点，且能支撑长期冲突推进。\n"
+)
+
+
+def _dump_truncated(canon_chars: Dict[str, Any], *, max_chars: int) -> str:
+    """
+    等价于 truncate_text(json.dumps(canon_chars, ensure_ascii=False, indent=2), max_chars)，
+    但对 {"characters": [...]} 只序列化头尾够用的人物：人物卡很多时不必整份 dump 再丢掉大部分。
+    """
+    arr = canon_chars.get("characters")
+    if list(canon_chars.keys()) != ["characters"] or not isinstance(arr, list) or not arr:
+        return truncate_text(json.dumps(canon_chars, ensure_ascii=False, indent=2), max_chars=max_chars)
+
+    def _item(x: Any) -> str:
+        # 嵌套在第 2 层：逐行再缩进 4 格，与整体 dump 的结果逐字一致（JSON 字符串内不会有裸换行）
+        return json.dumps(x, ensure_ascii=False, indent=2).replace("\n", "\n    ")
+
+    opening, sep, closing = '{\n  "characters": [\n    ', ",\n    ", "\n  ]\n}"
+    head_need = max_chars - 50
+    head = [opening]
+    head_len = len(opening)
+    i = 0
+    while i < len(arr) and head_len <= max_chars:
+        piece = (sep if i else "") + _item(arr[i])
+        head.append(piece)
+        head_len += len(piece)
+        i += 1
+    if i == len(arr) and head_len + len(closing) <= max_chars:
+        return "".join(head) + closing
+    # 尾部只需最后 50 字：从末尾往前序列化到够长为止
+    tail = [closing]
+    tail_len = len(closing)
+    j = len(arr) - 1
+    while j >= 0 and tail_len < 50:
+        piece = (sep if j else opening) + _item(arr[j])
+        tail.append(piece)
+        tail_len += len(piece)
+        j -= 1
+    return "".join(head)[:head_need] + "\n...[truncated]...\n" + "".join(reversed(tail))[-50:]
+
+
+# Canon 人物卡注入文本缓存：project_dir -> ((mtime_ns, size), 文本)。
+# 只缓存序列化+截断后的字符串（不可变，可安全复用）；characters.json 变化即失效。
+_CANON_CHARS_CACHE: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_CANON_CHARS_CACHE_MAX = 8
+
+
+def _canon_chars_text(project_dir: str) -> str:
+    """
+    Canon 人物卡（canon/characters.json）-> 注入 prompt 的 JSON 文本（截断到 3500 字）；没有人物卡时返回空串。
+    """
+    if not project_dir:
+        return ""
+    path = os.path.join(project_dir, "canon", "characters.json")
+    try:
+        st = os.stat(path)
+        sig = (st.st_mtime_ns, st.st_size)
+    except OSError:
+        sig = (0, 0)
+    hit = _CANON_CHARS_CACHE.get(project_dir)
+    if hit is not None and hit[0] == sig:
+        return hit[1]
+    canon_chars = (read_json(path) or {}) if sig != (0, 0) else {}
+    # 冷启动（还没有人物卡）返回空串：调用方据此整段省略 Canon 人物卡区块，少花输入 token
+    text = _dump_truncated(canon_chars, max_chars=3500) if canon_chars else ""
+    if len(_CANON_CHARS_CACHE) >= _CANON_CHARS_CACHE_MAX:
+        _CANON_CHARS_CACHE.clear()
+    _CANON_CHARS_CACHE[project_dir] = (sig, text)
+    return text
 
 
 def character_director_agent(state: StoryState) -> StoryState:
@@ -23,8 +114,8 @@ def character_director_agent(state: StoryState) -> StoryState:
     输出严格 JSON：用于 materials_bundle.characters。
     """
     logger = state.get("logger")
-    if logger:
-        logger.event("node_start", node="character_director", chapter_index=0)
+    log_event = event_sink(logger)
+    log_event("node_start", node="character_director", chapter_index=0)
 
     idea = str(state.get("user_input", "") or "")
     chapters_total = int(state.get("chapters_total", 1) or 1)
@@ -32,23 +123,10 @@ def character_director_agent(state: StoryState) -> StoryState:
     planner_result = state.get("planner_result") or {}
     project_name = str((planner_result or {}).get("项目名称", "") or "")
 
-    instr = ""
-    try:
-        tasks = planner_result.get("任务列表") if isinstance(planner_result, dict) else []
-        if isinstance(tasks, list):
-            for t in tasks:
-                if not isinstance(t, dict):
-                    continue
-                if str(t.get("任务名称", "") or "").strip() == "核心角色":
-                    instr = str(t.get("任务指令", "") or "").strip()
-                    break
-    except Exception:
-        instr = ""
+    instr = planner_task_instruction(planner_result, "核心角色")
 
     project_dir = str(state.get("project_dir", "") or "")
-    canon = load_canon_bundle(project_dir) if project_dir else {"world": {}, "characters": {}, "timeline": {}, "style": ""}
-    canon_chars = canon.get("characters") if isinstance(canon.get("characters"), dict) else {}
-    canon_chars_text = truncate_text(json.dumps(canon_chars, ensure_ascii=False, indent=2), max_chars=3500)
+    canon_chars_text = _canon_chars_text(project_dir)
 
     llm = state.get("llm")
     if llm:
@@ -60,57 +138,7 @@ def character_director_agent(state: StoryState) -> StoryState:
             llm = None
 
     if llm:
-        def _invoke_once(node_name: str, system_msg: SystemMessage, human_msg: HumanMessage):
-            if logger:
-                model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
-                with logger.llm_call(
-                    node=node_name,
-                    chapter_index=0,
-                    messages=[system_msg, human_msg],
-                    model=model,
-                    base_url=str(getattr(llm, "base_url", "") or ""),
-                ):
-                    return invoke_with_retry(
-                        llm,
-                        [system_msg, human_msg],
-                        max_attempts=int(state.get("llm_max_attempts", 3) or 3),
-                        base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
-                        logger=logger,
-                        node=node_name,
-                        chapter_index=0,
-                    )
-            return invoke_with_retry(
-                llm,
-                [system_msg, human_msg],
-                max_attempts=int(state.get("llm_max_attempts", 3) or 3),
-                base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
-            )
-
-        system = SystemMessage(
-            content=(
-                "你是小说项目的“角色导演”，负责产出可执行的人物卡。\n"
-                "你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown、不要多余文字）。\n"
-                "输出 JSON schema（字段允许为空，但必须是合法 JSON）：\n"
-                "{\n"
-                '  "characters": [\n'
-                "    {\n"
-                '      "name": "string",\n'
-                '      "traits": ["string"],\n'
-                '      "motivation": "string",\n'
-                '      "background": "string",\n'
-                '      "abilities": ["string"],\n'
-                '      "taboos": ["string"],\n'
-                '      "relationships": ["string"],\n'
-                '      "notes": "string"\n'
-                "    }\n"
-                "  ]\n"
-                "}\n"
-                "要求：\n"
-                "- 产出 3~6 个主要人物；每个角色必须有明确动机 + 1~3 个禁忌（便于写作一致性约束）。\n"
-                "- 若 Canon 已存在角色（同名），请只做“补全/增量”，不要改名、不要推翻既有条目。\n"
-                f"- 本次项目规模：总章数={chapters_total}；每章目标字数≈{target_words}（中文字符数近似）。请按规模设计人物弧线：核心人物至少有 2~3 个阶段性变化点，且能支撑长期冲突推进。\n"
-            )
-        )
+        system = SystemMessage(content=_SYSTEM_TMPL.format(chapters_total=chapters_total, target_words=target_words))
         human = HumanMessage(
             content=(
                 f"项目：{project_name}\n"
@@ -118,30 +146,13 @@ def character_director_agent(state: StoryState) -> StoryState:
                 f"章节数：{chapters_total}\n"
                 f"每章目标字数：{target_words}\n"
                 + (f"\n策划任务书（核心角色）：\n{instr}\n" if instr else "")
-                + "\n【Canon人物卡（真值来源，若存在需遵守/补全）】\n"
-                + f"{canon_chars_text}\n"
+                + (f"\n【Canon人物卡（真值来源，若存在需遵守/补全）】\n{canon_chars_text}\n" if canon_chars_text else "")
             )
         )
-        schema_text = (
-            "{\n"
-            '  "characters": [\n'
-            "    {\n"
-            '      "name": "string",\n'
-            '      "traits": ["string"],\n'
-            '      "motivation": "string",\n'
-            '      "background": "string",\n'
-            '      "abilities": ["string"],\n'
-            '      "taboos": ["string"],\n'
-            '      "relationships": ["string"],\n'
-            '      "notes": "string"\n'
-            "    }\n"
-            "  ]\n"
-            "}\n"
-        )
         obj, _raw, _fr0, _usage0 = invoke_json_with_repair(
             llm=llm,
             messages=[system, human],
-            schema_text=schema_text,
+            schema_text=_SCHEMA_TEXT,
             node="character_director",
             chapter_index=0,
             logger=logger,
@@ -152,14 +163,12 @@ def character_director_agent(state: StoryState) -> StoryState:
         if not obj:
             if state.get("force_llm", False):
                 raise ValueError("character_director_agent: 无法从 LLM 输出中提取 JSON（已重试）")
-            if logger:
-                logger.event("llm_parse_failed", node="character_director", chapter_index=0, action="fallback_template")
+            log_event("llm_parse_failed", node="character_director", chapter_index=0, action="fallback_template")
             llm = None
         else:
             state["character_director_result"] = obj
             state["character_director_used_llm"] = True
-            if logger:
-                logger.event("node_end", node="character_director", chapter_index=0, used_llm=True)
+            log_event("node_end", node="character_director", chapter_index=0, used_llm=True)
             return state
 
     # 模板兜底
@@ -178,8 +187,7 @@ def character_director_agent(state: StoryState) -> StoryState:
         ]
     }
     state["character_director_used_llm"] = False
-    if logger:
-        logger.event("node_end", node="character_director", chapter_index=0, used_llm=False)
+    log_event("node_end", node="character_director", chapter_index=0, used_llm=False)
     return state
 
 
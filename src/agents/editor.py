@@ -1,19 +1,190 @@
 from __future__ import annotations
 
+import hashlib
 import json
+import os
 import re
-from typing import Any, Dict, List, Tuple
+from contextlib import nullcontext
+from typing import Any, Dict, List, Optional, Tuple
 
 from state import StoryState
-from debug_log import truncate_text
-from storage import build_recent_memory_synopsis, load_canon_bundle, load_recent_chapter_memories, normalize_canon_bundle
-from storage import build_recent_arc_synopsis, load_recent_arc_summaries
-from storage import build_canon_text_for_context, infer_arc_start_from_materials_bundle, infer_current_arc_start
-from llm_meta import extract_finish_reason_and_usage
+from debug_log import event_sink, truncate_middle, truncate_text
+from prompt_context import context_blocks, context_signature
+from llm_meta import extract_finish_reason_and_usage, llm_identity
 from json_utils import extract_first_json_object
 from materials import materials_prompt_digest
+from planner_tasks import planner_result_text
+from advisor import scan_phrases
 from llm_call import invoke_with_retry
 from llm_json import invoke_json_with_repair
+from llm_cache import cache_get, cache_put, prompt_cache_key
+
+# 模板审核：开篇基调为“轻松”时，正文出现该词视为基调冲突
+_TEMPLATE_TONE_CLASH = "热血"
+
+# 送审正文的最小字符预算（实际预算随 target_words 放大）
+_TEXT_MIN_BUDGET_CHARS = 20000
+
+try:
+    # 模块级导入一次；缺依赖时 editor_agent 退回模板审核（force_llm 时报错）
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    _HAS_LC = True
+except Exception:  # pragma: no cover
+    SystemMessage = HumanMessage = None  # type: ignore[assignment,misc]
+    _HAS_LC = False
+
+
+# 主编 system prompt 的固定部分（模块加载时拼好）；中间随审稿轮次/模式变化的几行见 _editor_system_message
+_SYSTEM_HEAD = (
+    "你是苛刻的编辑部主编，负责最终稿件质量拍板。\n"
+    "你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown、不要多余文字）。\n"
+    "你要用“反证式审稿”：优先寻找会导致后续崩盘的逻辑漏洞/一致性漏洞/风格硬伤。\n"
+    "\n"
+    "一致性优先级（硬约束→软约束）：\n"
+    "1) Canon 设定（world/characters/timeline）：真值来源，任何冲突都算硬伤\n"
+    "2) 阶段3【材料包】（人物卡/本章细纲/基调/风格约束）：必须遵循；但不得覆盖 Canon\n"
+    "3) 最近章节记忆：用于连续性；若与 Canon 冲突，以 Canon 为准\n"
+    "4) 重写指导/用户风格覆盖/段落规则：若不与 Canon 冲突，优先执行\n"
+    "5) planner 任务：仅参考\n"
+    "\n"
+    "判定标准（更严格、更有效）：只要命中任一条“硬伤”，必须判定为 审核不通过：\n"
+    "- Canon 冲突：事实/规则/角色禁忌/能力/时间线与 Canon 明确不一致\n"
+    "- 细纲违背：材料包里“本章 goal/conflict/beats/ending_hook”有明确要求但正文未体现，或推进顺序/因果链明显不成立\n"
+    "- 人物不一致：人物言行与人物卡（traits/motivation/taboos）冲突；或关键动机缺失导致行为无因\n"
+    "- 内部逻辑漏洞：同章内自相矛盾（上一段说A，下一段说非A）、关键转折缺铺垫、因果断裂\n"
+    "- 命名漂移：正文引入大量新专有名词（门派/功法/地名/组织/物品等）且不在 Canon/材料包/已知名词清单中\n"
+    "- 风格硬伤：明显 AI 总结腔/元话语（例如“作为AI/接下来将…”）、句式机械重复、百科式灌设定导致叙事停滞\n"
+    "- 字数硬约束：明显偏离目标区间（过短导致情节不完整/过长导致拖沓）\n"
+    "\n"
+    "输出质量要求（避免无效审核）：\n"
+)
+_SYSTEM_TAIL = (
+    "- 每条 issue 必须“具体可执行”：指出哪里错 + 为什么错 + 怎么改（改法要能直接照做）。\n"
+    "- 每条 issue 必须包含 quote：从正文原样复制一小段，能定位到问题。\n"
+    "- 若你找不到可引用 quote，就不要输出该条（宁可少而准）。\n"
+    "- issues 请按严重程度从高到低排序（先硬伤后软伤）。\n"
+    "\n"
+    "输出 JSON schema：\n"
+    "{\n"
+    '  "decision": "审核通过|审核不通过",\n'
+    '  "issues": [\n'
+    "    {\n"
+    '      "type": "world|character|timeline|style|logic|readability",\n'
+    '      "canon_key": "string|N/A",\n'
+    '      "quote": "string",\n'
+    '      "issue": "string",\n'
+    '      "fix": "string",\n'
+    '      "action": "rewrite|canon_patch",\n'
+    '      "canon_patch": {"target":"world.json|characters.json|timeline.json|style.md|N/A","op":"append|note|N/A","path":"string|N/A","value":"any|N/A"}\n'
+    "    }\n"
+    "  ]\n"
+    "}\n"
+    "要求：\n"
+    "- decision=审核通过 时 issues 为空数组。\n"
+    "- decision=审核不通过 时：每条 issue 必须包含 quote（从正文原样复制）。\n"
+    "- canon_key：若属于设定冲突/缺失，尽量给出可定位的路径（例如 characters.characters[0].taboos / world.rules[2].name）；否则写 N/A。\n"
+    "- action=canon_patch 仅在“确实需要固化进 Canon 且会影响后续一致性”的信息时使用；否则用 rewrite。\n"
+    "- 宁可少而准：如果找不到 quote，不要输出该条。"
+)
+_ROUND_HEAD = "\n\n本轮审稿设置：\n"
+_FORCE_REJECT_LINE = "- 【复审强制模式】你必须判定为 审核不通过，并给出不少于 {n} 条 issues（每条必须含 quote/issue/fix/action）。\n"
+_STRICT_LINE = "- 【严格模式】请提高审稿标准：只要存在明显可改进项（细纲对齐不足、钩子弱、节奏拖沓、画面/心理不足、AI腔/重复句式、信息倾倒、命名漂移风险），倾向判定为 审核不通过 并给出可执行 issues。\n"
+_PENULTIMATE_LINE = "- 这是倒数第二次审稿：请尽可能多给出 issues（建议 6~12 条），把所有会导致下次返工的风险一次性指出。\n"
+_LAST_LINE = "- 这是最后一次审稿：请适当放宽标准以提高通过率。只有命中“硬伤”才拒稿；若仅是轻微措辞/润色/可接受的小瑕疵，请直接判定为 审核通过。\n"
+
+# 送审 prompt 的可选段落标题（顺序固定）：用户风格 / 段落约束 / 材料包 / Arc 摘要；内容为空的段落整段省略。
+# 稳定内容在前、每轮都变的重写指导与正文在后，返工重审时前缀保持一致（利于服务端前缀缓存）
+_OPTIONAL_SECTION_HEADS = (
+    "【用户风格覆盖（不与 Canon 冲突时优先执行）】\n",
+    "【段落/结构约束（不与 Canon 冲突时优先执行）】\n",
+    "【阶段3材料包（若提供则用于对照本章细纲/人物卡/基调；不得覆盖 Canon）】\n",
+    "【分卷/Arc摘要（参考，优先于单章梗概；避免长程矛盾）】\n",
+)
+_MEMORIES_HEAD = "【最近章节记忆（参考）】\n"
+_REWRITE_HEAD = "【重写指导（不与 Canon 冲突时最高优先级）】\n"
+# 影响送审 prompt 的标量 state 字段：与正文、Canon/记忆目录签名、材料包摘要一起构成“送审输入指纹”
+_INPUT_KEY_FIELDS = (
+    "chapter_index", "writer_version", "max_rewrites", "editor_force_reject_with_issues", "editor_strict_mode",
+    "memory_recent_k", "include_unapproved_memories", "arc_every_n", "arc_recent_k", "enable_arc_summary",
+    "editor_min_issues", "style_override", "paragraph_rules", "rewrite_instructions",
+    "target_words", "writer_min_ratio", "writer_max_ratio",
+)
+# JSON 修复/缓存键使用的报告结构简写
+_REPORT_SCHEMA_TEXT = (
+    "{\n"
+    '  "decision": "审核通过|审核不通过",\n'
+    '  "issues": [\n'
+    "    {\n"
+    '      "type": "logic|canon|pacing|character|style|readability",\n'
+    '      "canon_key": "string|N/A",\n'
+    '      "quote": "string",\n'
+    '      "issue": "string",\n'
+    '      "fix": "string",\n'
+    '      "action": "rewrite|canon_patch",\n'
+    '      "canon_patch": {"target":"world.json|characters.json|timeline.json|style.md|N/A","op":"append|note|N/A","path":"string|N/A","value":"any|N/A"}\n'
+    "    }\n"
+    "  ]\n"
+    "}\n"
+)
+
+# (轮次, 模式开关, issues 下限) -> SystemMessage；组合很少，按 key 复用同一个消息对象
+_SYSTEM_MSG_CACHE: Dict[Tuple[Any, ...], Any] = {}
+_SYSTEM_MSG_CACHE_MAX = 32
+
+
+def _review_input_key(
+    state: StoryState, writer_result: str, planner_result: Any, project_dir: str, mb: Any, chapter_index: int, model: str
+) -> str:
+    """
+    送审输入指纹：正文 + 影响 prompt 的标量参数 + Canon/记忆目录签名 + 材料包摘要 + 模型名。
+    只用已缓存/廉价的量（目录 stat、按对象缓存的摘要），不加载 Canon、不拼 prompt。
+    """
+    h = hashlib.blake2b(writer_result.encode("utf-8"), digest_size=16)
+    h.update(repr(tuple(state.get(f) for f in _INPUT_KEY_FIELDS)).encode("utf-8"))
+    h.update(planner_result_text(planner_result).encode("utf-8"))
+    if project_dir:
+        h.update(repr(context_signature(project_dir)).encode("utf-8"))
+    if isinstance(mb, dict) and mb:
+        h.update(materials_prompt_digest(mb, chapter_index=chapter_index).encode("utf-8"))
+    h.update(model.encode("utf-8"))
+    return h.hexdigest()
+
+
+def _editor_system_message(
+    *,
+    writer_version: int,
+    max_rewrites: int,
+    min_reject_issues: int,
+    force_reject: bool,
+    strict: bool,
+    penultimate: bool,
+    last: bool,
+) -> Any:
+    """
+    主编 SystemMessage：固定头尾 + 随审稿轮次/模式变化的几行；相同组合直接复用已构造的消息。
+    """
+    key = (writer_version, max_rewrites, min_reject_issues, force_reject, strict, penultimate, last)
+    hit = _SYSTEM_MSG_CACHE.get(key)
+    if hit is not None:
+        return hit
+    # 随轮次变化的几行放在固定头尾之后：同一份固定前缀在各轮/各章间保持一致，便于服务端前缀缓存命中
+    parts = [_SYSTEM_HEAD, _SYSTEM_TAIL, _ROUND_HEAD]
+    parts.append(f"- 本次审稿轮次：writer_version={writer_version} / max_rewrites={max_rewrites}。\n")
+    if force_reject:
+        parts.append(_FORCE_REJECT_LINE.format(n=int(min_reject_issues)))
+    if strict:
+        parts.append(_STRICT_LINE)
+    if penultimate:
+        parts.append(_PENULTIMATE_LINE)
+    if last:
+        parts.append(_LAST_LINE)
+    parts.append(f"- decision=审核不通过 时，issues 至少 {min_reject_issues} 条（每条必须可执行且包含 quote）。")
+    msg = SystemMessage(content="".join(parts))
+    if len(_SYSTEM_MSG_CACHE) >= _SYSTEM_MSG_CACHE_MAX:
+        _SYSTEM_MSG_CACHE.clear()
+    _SYSTEM_MSG_CACHE[key] = msg
+    return msg
 
 
 def _extract_first_json_obj(text: str) -> Dict[str, Any]:
@@ -21,20 +192,21 @@ def _extract_first_json_obj(text: str) -> Dict[str, Any]:
 
 
 def _format_issue_to_text(issue: Dict[str, Any]) -> str:
-    t = str(issue.get("type", "") or "").strip() or "N/A"
-    canon_key = str(issue.get("canon_key", "") or "").strip() or "N/A"
-    quote = str(issue.get("quote", "") or "").strip()
-    problem = str(issue.get("issue", "") or "").strip()
-    fix = str(issue.get("fix", "") or "").strip()
-    action = str(issue.get("action", "") or "").strip() or "rewrite"
-    parts = [f"【类型】{t}", f"【CanonKey】{canon_key}", f"【动作】{action}"]
-    if quote:
-        parts.append(f"【引用】{quote}")
-    if problem:
-        parts.append(f"【问题】{problem}")
-    if fix:
-        parts.append(f"【改法】{fix}")
-    return " ".join(parts).strip()
+    # 每条 issue 一次拼接成串（各段已 strip，拼接结果无首尾空白，无需再 join/strip）
+    g = issue.get
+    t = str(g("type") or "").strip() or "N/A"
+    canon_key = str(g("canon_key") or "").strip() or "N/A"
+    action = str(g("action") or "").strip() or "rewrite"
+    quote = str(g("quote") or "").strip()
+    problem = str(g("issue") or "").strip()
+    fix = str(g("fix") or "").strip()
+    return (
+        f"【类型】{t} 【CanonKey】{canon_key} 【动作】{action}"
+        + (f" 【引用】{quote}" if quote else "")
+        + (f" 【问题】{problem}" if problem else "")
+        + (f" 【改法】{fix}" if fix else "")
+    )
+
 
 def editor_agent(state: StoryState) -> StoryState:
     """
@@ -51,19 +223,16 @@ def editor_agent(state: StoryState) -> StoryState:
     issues: list[str] = []
 
     logger = state.get("logger")
+    # 打点统一走 log_event（无 logger 时为空操作），章节号只取一次
+    log_event = event_sink(logger)
+    ci = state.get("chapter_index", 1)
     llm = state.get("llm")
+    if llm and not _HAS_LC:
+        if state.get("force_llm", False):
+            raise RuntimeError("已指定 LLM 模式，但无法导入 langchain_core.messages（请检查依赖安装/解释器环境）")
+        llm = None
     if llm:
-        try:
-            from langchain_core.messages import SystemMessage, HumanMessage
-        except Exception as e:  # pragma: no cover
-            if state.get("force_llm", False):
-                raise RuntimeError(
-                    "已指定 LLM 模式，但无法导入 langchain_core.messages（请检查依赖安装/解释器环境）"
-                ) from e
-            llm = None
-    if llm:
-        if logger:
-            logger.event("node_start", node="editor", chapter_index=state.get("chapter_index", 1))
+        log_event("node_start", node="editor", chapter_index=ci)
 
         # 重申/复审模式：强制产出可执行 issues（用于驱动重写）
         # - 设计目的：有些模型倾向“直接放过”，导致 issues 为空，重写只能靠泛泛要求
@@ -79,56 +248,56 @@ def editor_agent(state: StoryState) -> StoryState:
         is_penultimate_review = (not is_last_review) and (writer_version == max_rewrites)
 
         # === 2.1：注入 Canon + 最近记忆（控制长度） ===
-        chapter_index = int(state.get("chapter_index", 1))
+        chapter_index = int(ci)
         project_dir = str(state.get("project_dir", "") or "")
         k = int(state.get("memory_recent_k", 3) or 3)
         include_unapproved = bool(state.get("include_unapproved_memories", False))
         arc_every_n = int(state.get("arc_every_n", 10) or 10)
         arc_k = int(state.get("arc_recent_k", 2) or 2)
-        arc_start = None
-        try:
-            mb = state.get("materials_bundle")
-            if isinstance(mb, dict) and mb:
-                arc_start = infer_arc_start_from_materials_bundle(mb, chapter_index=chapter_index)
-        except Exception:
-            arc_start = None
-        if not arc_start:
-            arc_start = infer_current_arc_start(project_dir, chapter_index=chapter_index, arc_every_n=arc_every_n) if project_dir else 1
-        recent_memories = (
-            load_recent_chapter_memories(
-                project_dir,
-                before_chapter=chapter_index,
-                k=k,
-                include_unapproved=include_unapproved,
-                min_chapter=arc_start,
-            )
-            if project_dir
-            else []
-        )
-        arc_text = ""
-        if bool(state.get("enable_arc_summary", True)) and project_dir:
-            arcs = load_recent_arc_summaries(project_dir, before_chapter=chapter_index, k=arc_k)
-            arc_text = truncate_text(build_recent_arc_synopsis(arcs), max_chars=1400)
-        canon_text = (
-            build_canon_text_for_context(
-                project_dir,
-                chapter_index=chapter_index,
-                arc_every_n=arc_every_n,
-                arc_recent_k=arc_k,
-                include_unapproved=include_unapproved,
-                materials_bundle=(state.get("materials_bundle") if isinstance(state.get("materials_bundle"), dict) else None),
-                max_chars=6000,
+        mb = state.get("materials_bundle")
+        model, base_url = llm_identity(llm)
+
+        # 幂等重跑（非主编节点重新触发、正文与全部输入都没变）：直接沿用 state 里上次的审稿结论，
+        # 连 Canon/记忆加载和 prompt 拼接都跳过。与 editor_cache 同开关，editor_cache_bypass 时照常重审。
+        input_key = ""
+        if state.get("editor_cache"):
+            input_key = _review_input_key(
+                state, writer_result, planner_result, project_dir, mb, chapter_index, str(model or "")
             )
-            if project_dir
-            else "（无）"
+            prev = state.get("editor_report")
+            if (
+                not state.get("editor_cache_bypass")
+                and state.get("editor_input_key") == input_key
+                and isinstance(prev, dict)
+                and state.get("editor_decision") in ("审核通过", "审核不通过")
+            ):
+                log_event("editor_rerun_skipped", node="editor", chapter_index=ci, key=input_key)
+                log_event(
+                    "node_end",
+                    node="editor",
+                    chapter_index=ci,
+                    used_llm=True,
+                    editor_decision=state.get("editor_decision"),
+                    feedback_count=len(state.get("editor_feedback") or []),
+                    canon_suggestions_count=len(state.get("canon_suggestions") or []),
+                )
+                return state
+
+        canon_text, memories_text, arc_text = context_blocks(
+            project_dir,
+            chapter_index=chapter_index,
+            k=k,
+            include_unapproved=include_unapproved,
+            arc_every_n=arc_every_n,
+            arc_k=arc_k,
+            enable_arc_summary=bool(state.get("enable_arc_summary", True)),
+            materials_bundle=mb if isinstance(mb, dict) and mb else None,
         )
-        memories_text = truncate_text(build_recent_memory_synopsis(recent_memories), max_chars=1200)
 
         # === 2.0：阶段3材料包（用于主编审核对照：本章细纲/人物卡/基调） ===
-        materials_bundle = state.get("materials_bundle") or {}
         materials_text = ""
-        if isinstance(materials_bundle, dict) and materials_bundle:
-            materials_text = materials_prompt_digest(materials_bundle, chapter_index=chapter_index)
+        if isinstance(mb, dict) and mb:
+            materials_text = materials_prompt_digest(mb, chapter_index=chapter_index)
 
         # editor 稳定性参数：同时用于要求一次性输出足够多 issues
         editor_min_issues = max(0, int(state.get("editor_min_issues", 2) or 2))
@@ -148,114 +317,49 @@ def editor_agent(state: StoryState) -> StoryState:
         user_style = truncate_text(str(state.get("style_override", "") or "").strip(), max_chars=1200)
         paragraph_rules = truncate_text(str(state.get("paragraph_rules", "") or "").strip(), max_chars=800)
         rewrite_instructions = truncate_text(str(state.get("rewrite_instructions", "") or "").strip(), max_chars=1600)
-        system = SystemMessage(
-            content=(
-                "你是苛刻的编辑部主编，负责最终稿件质量拍板。\n"
-                "你必须且仅输出一个严格 JSON 对象（不要解释、不要 markdown、不要多余文字）。\n"
-                "你要用“反证式审稿”：优先寻找会导致后续崩盘的逻辑漏洞/一致性漏洞/风格硬伤。\n"
-                "\n"
-                "一致性优先级（硬约束→软约束）：\n"
-                "1) Canon 设定（world/characters/timeline）：真值来源，任何冲突都算硬伤\n"
-                "2) 阶段3【材料包】（人物卡/本章细纲/基调/风格约束）：必须遵循；但不得覆盖 Canon\n"
-                "3) 最近章节记忆：用于连续性；若与 Canon 冲突，以 Canon 为准\n"
-                "4) 重写指导/用户风格覆盖/段落规则：若不与 Canon 冲突，优先执行\n"
-                "5) planner 任务：仅参考\n"
-                "\n"
-                "判定标准（更严格、更有效）：只要命中任一条“硬伤”，必须判定为 审核不通过：\n"
-                "- Canon 冲突：事实/规则/角色禁忌/能力/时间线与 Canon 明确不一致\n"
-                "- 细纲违背：材料包里“本章 goal/conflict/beats/ending_hook”有明确要求但正文未体现，或推进顺序/因果链明显不成立\n"
-                "- 人物不一致：人物言行与人物卡（traits/motivation/taboos）冲突；或关键动机缺失导致行为无因\n"
-                "- 内部逻辑漏洞：同章内自相矛盾（上一段说A，下一段说非A）、关键转折缺铺垫、因果断裂\n"
-                "- 命名漂移：正文引入大量新专有名词（门派/功法/地名/组织/物品等）且不在 Canon/材料包/已知名词清单中\n"
-                "- 风格硬伤：明显 AI 总结腔/元话语（例如“作为AI/接下来将…”）、句式机械重复、百科式灌设定导致叙事停滞\n"
-                "- 字数硬约束：明显偏离目标区间（过短导致情节不完整/过长导致拖沓）\n"
-                "\n"
-                "输出质量要求（避免无效审核）：\n"
-                f"- 本次审稿轮次：writer_version={writer_version} / max_rewrites={max_rewrites}。\n"
-                + (
-                    f"- 【复审强制模式】你必须判定为 审核不通过，并给出不少于 {int(min_reject_issues)} 条 issues（每条必须含 quote/issue/fix/action）。\n"
-                    if force_reject_with_issues
-                    else ""
-                )
-                + (
-                    "- 【严格模式】请提高审稿标准：只要存在明显可改进项（细纲对齐不足、钩子弱、节奏拖沓、画面/心理不足、AI腔/重复句式、信息倾倒、命名漂移风险），倾向判定为 审核不通过 并给出可执行 issues。\n"
-                    if (strict_mode and (not is_last_review) and (not force_reject_with_issues))
-                    else ""
-                )
-                + ("- 这是倒数第二次审稿：请尽可能多给出 issues（建议 6~12 条），把所有会导致下次返工的风险一次性指出。\n" if is_penultimate_review else "")
-                + ("- 这是最后一次审稿：请适当放宽标准以提高通过率。只有命中“硬伤”才拒稿；若仅是轻微措辞/润色/可接受的小瑕疵，请直接判定为 审核通过。\n" if is_last_review else "")
-                + f"- decision=审核不通过 时，issues 至少 {min_reject_issues} 条（每条必须可执行且包含 quote）。\n"
-                "- 每条 issue 必须“具体可执行”：指出哪里错 + 为什么错 + 怎么改（改法要能直接照做）。\n"
-                "- 每条 issue 必须包含 quote：从正文原样复制一小段，能定位到问题。\n"
-                "- 若你找不到可引用 quote，就不要输出该条（宁可少而准）。\n"
-                "- issues 请按严重程度从高到低排序（先硬伤后软伤）。\n"
-                "\n"
-                "输出 JSON schema：\n"
-                "{\n"
-                '  "decision": "审核通过|审核不通过",\n'
-                '  "issues": [\n'
-                "    {\n"
-                '      "type": "world|character|timeline|style|logic|readability",\n'
-                '      "canon_key": "string|N/A",\n'
-                '      "quote": "string",\n'
-                '      "issue": "string",\n'
-                '      "fix": "string",\n'
-                '      "action": "rewrite|canon_patch",\n'
-                '      "canon_patch": {"target":"world.json|characters.json|timeline.json|style.md|N/A","op":"append|note|N/A","path":"string|N/A","value":"any|N/A"}\n'
-                "    }\n"
-                "  ]\n"
-                "}\n"
-                "要求：\n"
-                "- decision=审核通过 时 issues 为空数组。\n"
-                "- decision=审核不通过 时：每条 issue 必须包含 quote（从正文原样复制）。\n"
-                "- canon_key：若属于设定冲突/缺失，尽量给出可定位的路径（例如 characters.characters[0].taboos / world.rules[2].name）；否则写 N/A。\n"
-                "- action=canon_patch 仅在“确实需要固化进 Canon 且会影响后续一致性”的信息时使用；否则用 rewrite。\n"
-                "- 宁可少而准：如果找不到 quote，不要输出该条。"
-            )
+        system = _editor_system_message(
+            writer_version=writer_version,
+            max_rewrites=max_rewrites,
+            min_reject_issues=min_reject_issues,
+            force_reject=force_reject_with_issues,
+            strict=strict_mode and (not is_last_review) and (not force_reject_with_issues),
+            penultimate=is_penultimate_review,
+            last=is_last_review,
         )
-        human = HumanMessage(
-            content=(
-                f"项目名称：{project_name}\n"
-                f"章节：第{chapter_index}章\n"
-                + (
-                    f"目标字数：{int(state.get('target_words', 800) or 800)}"
-                    f"（约束区间：{int(int(state.get('target_words', 800) or 800)*float(state.get('writer_min_ratio', 0.75) or 0.75))}~"
-                    f"{int(int(state.get('target_words', 800) or 800)*float(state.get('writer_max_ratio', 1.25) or 1.25))}）\n"
-                )
-                + f"策划任务（参考）：{planner_result}\n\n"
-                "【Canon 设定（真值来源）】\n"
-                f"{canon_text}\n\n"
-                + (("【重写指导（不与 Canon 冲突时最高优先级）】\n" + rewrite_instructions + "\n\n") if rewrite_instructions else "")
-                + (("【用户风格覆盖（不与 Canon 冲突时优先执行）】\n" + user_style + "\n\n") if user_style else "")
-                + (("【段落/结构约束（不与 Canon 冲突时优先执行）】\n" + paragraph_rules + "\n\n") if paragraph_rules else "")
-                + (
-                    ("【阶段3材料包（若提供则用于对照本章细纲/人物卡/基调；不得覆盖 Canon）】\n" + materials_text + "\n\n")
-                    if materials_text
-                    else ""
-                )
-                + (("【分卷/Arc摘要（参考，优先于单章梗概；避免长程矛盾）】\n" + arc_text + "\n\n") if arc_text else "")
-                + "【最近章节记忆（参考）】\n"
-                f"{memories_text}\n\n"
-                + "正文：\n"
-                f"{writer_result}\n"
+        # 正文可能很长（每轮返工都要重拼）：各段先放进列表，最后一次 join 成精确大小的字符串
+        target_words = int(state.get("target_words", 800) or 800)
+        min_ratio = float(state.get("writer_min_ratio", 0.75) or 0.75)
+        max_ratio = float(state.get("writer_max_ratio", 1.25) or 1.25)
+        # 正文预算：正常稿件（含缩稿失败的偏长稿）原样送审；异常超长时保留首尾、省略中间，
+        # 避免整段超长 prompt 被服务端拒绝或被模型静默丢弃中段
+        text_budget = max(_TEXT_MIN_BUDGET_CHARS, int(target_words * max_ratio * 3))
+        review_text = truncate_middle(writer_result, text_budget)
+        if len(review_text) < len(writer_result):
+            log_event(
+                "editor_text_truncated",
+                node="editor",
+                chapter_index=chapter_index,
+                writer_chars=len(writer_result),
+                budget_chars=text_budget,
             )
-        )
-        schema_text = (
-            "{\n"
-            '  "decision": "审核通过|审核不通过",\n'
-            '  "issues": [\n'
-            "    {\n"
-            '      "type": "logic|canon|pacing|character|style|readability",\n'
-            '      "canon_key": "string|N/A",\n'
-            '      "quote": "string",\n'
-            '      "issue": "string",\n'
-            '      "fix": "string",\n'
-            '      "action": "rewrite|canon_patch",\n'
-            '      "canon_patch": {"target":"world.json|characters.json|timeline.json|style.md|N/A","op":"append|note|N/A","path":"string|N/A","value":"any|N/A"}\n'
-            "    }\n"
-            "  ]\n"
-            "}\n"
-        )
+        parts: List[str] = [
+            f"项目名称：{project_name}\n",
+            f"章节：第{chapter_index}章\n",
+            f"目标字数：{target_words}"
+            f"（约束区间：{int(target_words*min_ratio)}~{int(target_words*max_ratio)}）\n",
+            "策划任务（参考）：", planner_result_text(planner_result), "\n\n",
+            "【Canon 设定（真值来源）】\n", canon_text, "\n\n",
+        ]
+        optional = (user_style, paragraph_rules, materials_text, arc_text)
+        for head, body in zip(_OPTIONAL_SECTION_HEADS, optional):
+            if body:
+                parts += [head, body, "\n\n"]
+        parts += [_MEMORIES_HEAD, memories_text, "\n\n"]
+        if rewrite_instructions:
+            parts += [_REWRITE_HEAD, rewrite_instructions, "\n\n"]
+        parts += ["正文：\n", review_text, "\n"]
+        human = HumanMessage(content="".join(parts))
+        schema_text = _REPORT_SCHEMA_TEXT
 
         def _validate(rep: Dict[str, Any]) -> str:
             dec = str(rep.get("decision", "") or "").strip()
@@ -288,42 +392,56 @@ def editor_agent(state: StoryState) -> StoryState:
                     return f"issue_missing_action(idx={i})"
             return ""
 
-        if logger:
-            model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
-            with logger.llm_call(
-                node="editor",
-                chapter_index=state.get("chapter_index", 1),
-                messages=[system, human],
-                model=model,
-                base_url=str(getattr(llm, "base_url", "") or ""),
-            ):
-                report, _raw, _fr, _usage = invoke_json_with_repair(
+        # 可选结果缓存（editor_cache）：相同 prompt（含 Canon/记忆/正文）直接复用上次“已通过校验”的报告，
+        # 跳过整次网络往返；只缓存校验通过的结果，避免把坏输出固化下来。
+        report: Optional[Dict[str, Any]] = None
+        cache_key = ""
+        cache_dir = ""
+        if state.get("editor_cache"):
+            cache_key = prompt_cache_key(
+                [system, human],
+                model=str(model or ""),
+                extra=f"{schema_text}|{min_reject_issues}|{force_reject_with_issues}",
+            )
+            cache_dir = os.path.join(project_dir, ".cache", "editor") if project_dir else ""
+            # editor_cache_bypass：本次强制重新审稿（例如人工要求“再审一次”），结果仍会刷新缓存
+            if not state.get("editor_cache_bypass"):
+                report = cache_get(cache_key, cache_dir)
+            if report is not None:
+                log_event("llm_cache_hit", node="editor", chapter_index=ci, key=cache_key)
+        if report is None:
+            if logger:
+                call_span = logger.llm_call(
+                    node="editor",
+                    chapter_index=ci,
+                    messages=[system, human],
+                    model=model,
+                    base_url=base_url,
+                )
+            else:
+                call_span = nullcontext()
+            with call_span:
+                report, _raw, fr, _usage = invoke_json_with_repair(
                     llm=llm,
                     messages=[system, human],
                     schema_text=schema_text,
                     node="editor",
-                    chapter_index=state.get("chapter_index", 1),
+                    chapter_index=ci,
                     logger=logger,
                     max_attempts=int(state.get("llm_max_attempts", 3) or 3),
                     base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
                     validate=_validate,
+                    stream=True,
+                    salvage_truncated=True,
                 )
-        else:
-            report, _raw, _fr, _usage = invoke_json_with_repair(
-                llm=llm,
-                messages=[system, human],
-                schema_text=schema_text,
-                node="editor",
-                chapter_index=state.get("chapter_index", 1),
-                logger=None,
-                max_attempts=int(state.get("llm_max_attempts", 3) or 3),
-                base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
-                validate=_validate,
-            )
+            # 截断输出（含本地补齐的残缺报告）不入缓存：否则相同 prompt 会一直复用这份不完整的审稿结论
+            if cache_key and report and str(fr or "").strip().lower() != "length":
+                cache_put(cache_key, report, cache_dir)
 
         decision = str(report.get("decision", "") or "").strip()
         iss_obj = report.get("issues")
-        issues_list: List[Dict[str, Any]] = [x for x in iss_obj if isinstance(x, dict)] if isinstance(iss_obj, list) else []
+        # filter + dict.__instancecheck__：逐项类型检查走 C 调用（语义同 isinstance(x, dict)）
+        issues_list: List[Dict[str, Any]] = list(filter(dict.__instancecheck__, iss_obj)) if isinstance(iss_obj, list) else []
 
         # 最终兜底：仍然不合法就降级为“审核不通过 + 结构化最小问题”，避免整次运行退出
         if decision not in ("审核通过", "审核不通过"):
@@ -356,80 +474,83 @@ def editor_agent(state: StoryState) -> StoryState:
                 )
             report = {"decision": decision, "issues": issues_list}
 
-        state["editor_report"] = {"decision": decision, "issues": issues_list}
-        state["editor_decision"] = decision
-        state["editor_used_llm"] = True
-        state["needs_rewrite"] = decision != "审核通过"
-
         # 生成 writer 可用的可读反馈
-        state["editor_feedback"] = [_format_issue_to_text(it) for it in issues_list]
-
-        # 分离 canon_suggestions（只落盘，不自动应用）
+        # 一次遍历同时生成 feedback 与 canon_suggestions（后者只落盘，不自动应用）
+        feedback: List[str] = []
         canon_suggestions: List[Dict[str, Any]] = []
         for it in issues_list:
+            feedback.append(_format_issue_to_text(it))
             if str(it.get("action", "") or "").strip() == "canon_patch":
                 canon_suggestions.append(it)
-        state["canon_suggestions"] = canon_suggestions
+        # 结论字段一次性写回
+        state.update(
+            {
+                "editor_report": {"decision": decision, "issues": issues_list},
+                "editor_decision": decision,
+                "editor_used_llm": True,
+                "needs_rewrite": decision != "审核通过",
+                "editor_feedback": feedback,
+                "canon_suggestions": canon_suggestions,
+                "editor_input_key": input_key,
+            }
+        )
 
-        if logger:
-            logger.event(
-                "node_end",
-                node="editor",
-                chapter_index=state.get("chapter_index", 1),
-                used_llm=True,
-                editor_decision=str(state.get("editor_decision", "")),
-                feedback_count=len(state.get("editor_feedback", []) or []),
-                canon_suggestions_count=len(canon_suggestions),
-            )
+        log_event(
+            "node_end",
+            node="editor",
+            chapter_index=ci,
+            used_llm=True,
+            editor_decision=decision,
+            feedback_count=len(feedback),
+            canon_suggestions_count=len(canon_suggestions),
+        )
         return state
 
     # 模板审核：做最基础的一致性与可读性检查
-    if logger:
-        logger.event("node_start", node="editor", chapter_index=state.get("chapter_index", 1))
-    if project_name not in writer_result:
-        issues.append(f"正文中未包含项目名称 '{project_name}'，建议添加或调整开篇。")
-
+    log_event("node_start", node="editor", chapter_index=ci)
     # 假设检查开篇基调（示例）：
     opening_style = planner_result.get("任务列表", [])[-1].get("任务指令", "")
-    if "轻松" in opening_style and "热血" in writer_result:
+    check_tone = "轻松" in opening_style
+    # 项目名/基调冲突词在正文里一次扫完（空项目名视为“已包含”，与 `"" in s` 一致）
+    found = scan_phrases(writer_result, (project_name, _TEMPLATE_TONE_CLASH) if check_tone else (project_name,))
+    if project_name and project_name not in found:
+        issues.append(f"正文中未包含项目名称 '{project_name}'，建议添加或调整开篇。")
+    if check_tone and _TEMPLATE_TONE_CLASH in found:
         issues.append("正文风格与开篇基调可能不符，建议调整语气。")
 
     # 如果发现问题，放入 state 供 Writer 重写
-    if issues:
-        state["editor_decision"] = "审核不通过"
-        state["editor_feedback"] = issues
-        state["editor_report"] = {
-            "decision": "审核不通过",
-            "issues": [
-                {
-                    "type": "readability",
-                    "canon_key": "N/A",
-                    "quote": "",
-                    "issue": x,
-                    "fix": "",
-                    "action": "rewrite",
-                    "canon_patch": {"target": "N/A", "op": "N/A", "path": "N/A", "value": "N/A"},
-                }
-                for x in issues
-            ],
+    decision = "审核不通过" if issues else "审核通过"
+    state.update(
+        {
+            "editor_decision": decision,
+            "editor_feedback": issues,
+            "editor_report": {
+                "decision": decision,
+                "issues": [
+                    {
+                        "type": "readability",
+                        "canon_key": "N/A",
+                        "quote": "",
+                        "issue": x,
+                        "fix": "",
+                        "action": "rewrite",
+                        "canon_patch": {"target": "N/A", "op": "N/A", "path": "N/A", "value": "N/A"},
+                    }
+                    for x in issues
+                ],
+            },
+            "canon_suggestions": [],
+            "needs_rewrite": bool(issues),
+            "editor_used_llm": False,
         }
-        state["canon_suggestions"] = []
-        state["needs_rewrite"] = True
-    else:
-        state["editor_decision"] = "审核通过"
-        state["editor_feedback"] = []
-        state["editor_report"] = {"decision": "审核通过", "issues": []}
-        state["canon_suggestions"] = []
-        state["needs_rewrite"] = False
-    state["editor_used_llm"] = False
-    if logger:
-        logger.event(
-            "node_end",
-            node="editor",
-            chapter_index=state.get("chapter_index", 1),
-            used_llm=False,
-            editor_decision=str(state.get("editor_decision", "")),
-            feedback_count=len(state.get("editor_feedback", []) or []),
-        )
+    )
+    log_event(
+        "node_end",
+        node="editor",
+        chapter_index=ci,
+        used_llm=False,
+        editor_decision=decision,
+        feedback_count=len(issues),
+    )
 
     return state
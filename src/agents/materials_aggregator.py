@@ -5,6 +5,7 @@ from typing import Any, Dict
 from state import StoryState
 from debug_log import truncate_text
 from llm_json import invoke_json_with_repair
+from llm_meta import llm_identity
 from materials import (
     build_materials_bundle,
     ensure_characters,
@@ -154,13 +155,13 @@ def materials_aggregator_agent(state: StoryState) -> StoryState:
                 return ""
 
             if logger:
-                model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+                model, base_url = llm_identity(llm)
                 with logger.llm_call(
                     node="materials_pack",
                     chapter_index=0,
                     messages=[system, human],
                     model=model,
-                    base_url=str(getattr(llm, "base_url", "") or ""),
+                    base_url=base_url,
                     extra={"chapters_total": chapters_total, "target_words": target_words},
                 ):
                     pack, _raw, _fr, _usage = invoke_json_with_repair(
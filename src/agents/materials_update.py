@@ -5,7 +5,7 @@ from typing import Any, Dict, List
 
 from state import StoryState
 from debug_log import truncate_text
-from llm_meta import extract_finish_reason_and_usage
+from llm_meta import extract_finish_reason_and_usage, llm_identity
 from json_utils import extract_first_json_object
 from storage import load_canon_bundle, normalize_canon_bundle
 from materials import materials_prompt_digest
@@ -159,13 +159,13 @@ def materials_update_agent(state: StoryState) -> StoryState:
         return ""
 
     if logger:
-        model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+        model, base_url = llm_identity(llm)
         with logger.llm_call(
             node="materials_update",
             chapter_index=chapter_index,
             messages=[system, human],
             model=model,
-            base_url=str(getattr(llm, "base_url", "") or ""),
+            base_url=base_url,
         ):
             obj, _raw, _fr, _usage = invoke_json_with_repair(
                 llm=llm,
@@ -2,21 +2,194 @@ from __future__ import annotations
 
 import json
 import re
-from typing import Any, Dict, List
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
 
 from state import StoryState
 from debug_log import truncate_text
-from llm_meta import extract_finish_reason_and_usage
+from llm_meta import extract_finish_reason_and_usage, llm_identity
 from storage import load_canon_bundle
 from json_utils import extract_first_json_object
 from llm_call import invoke_with_retry
 from llm_json import invoke_json_with_repair
 
+try:
+    # 模块级导入一次；缺依赖时 memory_agent 退回模板记忆
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    _HAS_LC = True
+except Exception:  # pragma: no cover
+    SystemMessage = HumanMessage = None  # type: ignore[assignment,misc]
+    _HAS_LC = False
+
 
 def _extract_first_json_obj(text: str) -> Dict[str, Any]:
     return extract_first_json_object(text)
 
 
+_SCHEMA_TEXT = (
+    "{\n"
+    '  "chapter_index": number,\n'
+    '  "summary": "string",\n'
+    '  "events": [{"what":"string","where":"string","who":["string"],"result":"string"}],\n'
+    '  "character_updates": [{"name":"string","status":"string","new_info":"string"}],\n'
+    '  "new_facts": [{"type":"world|character|timeline|item|place|faction","key":"string","value":"string"}],\n'
+    '  "open_threads": ["string"],\n'
+    '  "style_notes": ["string"]\n'
+    "}\n"
+)
+_SYSTEM_TEXT = (
+    "你是小说项目的“记忆整理员”。你将把本章正文整理成可检索的结构化记忆。\n"
+    "你必须且仅输出一个格式严格的 JSON 对象（不要解释、不要 markdown）。\n"
+    "JSON schema（字段可为空，但必须是合法 JSON）：\n"
+    + _SCHEMA_TEXT
+    + "要求：summary 100~250字；events 3~8条；new_facts 只写本章明确新增/确认的信息。"
+)
+# 记忆整理 SystemMessage 内容固定：模块加载时构造一次，之后每章复用
+_SYSTEM_MSG = SystemMessage(content=_SYSTEM_TEXT) if _HAS_LC else None
+
+# 记忆预取登记表：(project_dir, chapter_index, writer_version) -> (Future, 发起时的正文)。
+# 放在模块级而不是 state 里：Future 不可序列化，state 要保持可被 checkpointer 持久化
+_PREFETCH: Dict[Tuple[str, int, int], Tuple["Future[Dict[str, Any]]", str]] = {}
+_PREFETCH_LOCK = threading.Lock()
+
+
+def _prefetch_key(state: StoryState) -> Tuple[str, int, int]:
+    return (
+        str(state.get("project_dir", "") or ""),
+        int(state.get("chapter_index", 1)),
+        int(state.get("writer_version", 1) or 1),
+    )
+
+
+def _take_prefetch(state: StoryState) -> Optional[Tuple["Future[Dict[str, Any]]", str]]:
+    with _PREFETCH_LOCK:
+        return _PREFETCH.pop(_prefetch_key(state), None)
+
+
+def _llm_extract_memory(
+    state: StoryState,
+    llm: Any,
+    *,
+    chapter_index: int,
+    project_name: str,
+    writer_result: str,
+    logger: Any,
+) -> Dict[str, Any]:
+    """
+    LLM 抽取本章结构化记忆（只依赖正文，不依赖主编结论）；元信息字段由调用方补齐。
+    """
+    system = _SYSTEM_MSG
+    human = HumanMessage(
+        content=(
+            f"项目：{project_name}\n"
+            f"章节：第{chapter_index}章\n\n"
+            "正文：\n"
+            f"{writer_result}\n"
+        )
+    )
+
+    schema_text = _SCHEMA_TEXT
+
+    def _validate(m: Dict[str, Any]) -> str:
+        # 轻量校验：至少要有 summary 与 events（否则后续不可用）
+        if not str(m.get("summary", "") or "").strip():
+            return "missing_or_empty_summary"
+        ev = m.get("events")
+        if not isinstance(ev, list) or len(ev) == 0:
+            return "missing_or_empty_events"
+        return ""
+
+    if logger:
+        model, base_url = llm_identity(llm)
+        with logger.llm_call(
+            node="memory",
+            chapter_index=chapter_index,
+            messages=[system, human],
+            model=model,
+            base_url=base_url,
+        ):
+            mem, _raw, _fr, _usage = invoke_json_with_repair(
+                llm=llm,
+                messages=[system, human],
+                schema_text=schema_text,
+                node="memory",
+                chapter_index=chapter_index,
+                logger=logger,
+                max_attempts=int(state.get("llm_max_attempts", 3) or 3),
+                base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
+                validate=_validate,
+            )
+    else:
+        mem, _raw, _fr, _usage = invoke_json_with_repair(
+            llm=llm,
+            messages=[system, human],
+            schema_text=schema_text,
+            node="memory",
+            chapter_index=chapter_index,
+            logger=None,
+            max_attempts=int(state.get("llm_max_attempts", 3) or 3),
+            base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
+            validate=_validate,
+        )
+    return mem
+
+
+def prefetch_chapter_memory(state: StoryState) -> Optional["Future[Dict[str, Any]]"]:
+    """
+    在后台线程提前发起本章记忆抽取（供主编最后一轮审核期间并发执行）。
+    Future 登记在模块级登记表（按 project_dir/章节/writer_version），由 memory_agent 校验正文一致后取用；
+    无 LLM / 缺依赖 / 正文为空时不发起，返回 None。
+    """
+    llm = state.get("llm")
+    writer_result = str(state.get("writer_result", "") or "")
+    if not llm or not writer_result or not _HAS_LC:
+        return None
+    planner_result = state.get("planner_result") or {}
+    try:
+        project_name = str((planner_result or {}).get("项目名称", "") or "")
+    except Exception:
+        project_name = ""
+    pool = ThreadPoolExecutor(max_workers=1)
+    try:
+        fut = pool.submit(
+            _llm_extract_memory,
+            state,
+            llm,
+            chapter_index=int(state.get("chapter_index", 1)),
+            project_name=project_name,
+            writer_result=writer_result,
+            logger=state.get("logger"),
+        )
+    finally:
+        # 不等待：线程跑完这一个任务即退出
+        pool.shutdown(wait=False)
+    with _PREFETCH_LOCK:
+        _PREFETCH[_prefetch_key(state)] = (fut, writer_result)
+    return fut
+
+
+def discard_chapter_memory_prefetch(state: StoryState) -> None:
+    """
+    作废本章的记忆预取（例如主编节点抛错、本章不会再进入 memory）：移出登记表并尽量取消。
+    已在运行的 LLM 调用无法中断，只能让它跑完后被丢弃；这里记一条事件便于对照日志。
+    """
+    taken = _take_prefetch(state)
+    if taken is None:
+        return
+    fut = taken[0]
+    cancelled = fut.cancel()
+    logger = state.get("logger")
+    if logger:
+        logger.event(
+            "memory_prefetch_abandoned",
+            node="memory",
+            chapter_index=int(state.get("chapter_index", 1)),
+            cancelled=cancelled,
+        )
+
+
 def memory_agent(state: StoryState) -> StoryState:
     """
     章节记忆 Agent（chapter memory）：
@@ -47,91 +220,37 @@ def memory_agent(state: StoryState) -> StoryState:
         project_name = ""
 
     llm = state.get("llm")
-    if llm:
-        try:
-            from langchain_core.messages import SystemMessage, HumanMessage
-        except Exception:
-            llm = None
+    if llm and not _HAS_LC:
+        llm = None
 
     if llm:
-        system = SystemMessage(
-            content=(
-                "你是小说项目的“记忆整理员”。你将把本章正文整理成可检索的结构化记忆。\n"
-                "你必须且仅输出一个格式严格的 JSON 对象（不要解释、不要 markdown）。\n"
-                "JSON schema（字段可为空，但必须是合法 JSON）：\n"
-                "{\n"
-                '  "chapter_index": number,\n'
-                '  "summary": "string",\n'
-                '  "events": [{"what":"string","where":"string","who":["string"],"result":"string"}],\n'
-                '  "character_updates": [{"name":"string","status":"string","new_info":"string"}],\n'
-                '  "new_facts": [{"type":"world|character|timeline|item|place|faction","key":"string","value":"string"}],\n'
-                '  "open_threads": ["string"],\n'
-                '  "style_notes": ["string"]\n'
-                "}\n"
-                "要求：summary 100~250字；events 3~8条；new_facts 只写本章明确新增/确认的信息。"
-            )
-        )
-        human = HumanMessage(
-            content=(
-                f"项目：{project_name}\n"
-                f"章节：第{chapter_index}章\n\n"
-                "正文：\n"
-                f"{writer_result}\n"
-            )
-        )
-
-        schema_text = (
-            "{\n"
-            '  "chapter_index": number,\n'
-            '  "summary": "string",\n'
-            '  "events": [{"what":"string","where":"string","who":["string"],"result":"string"}],\n'
-            '  "character_updates": [{"name":"string","status":"string","new_info":"string"}],\n'
-            '  "new_facts": [{"type":"world|character|timeline|item|place|faction","key":"string","value":"string"}],\n'
-            '  "open_threads": ["string"],\n'
-            '  "style_notes": ["string"]\n'
-            "}\n"
-        )
-
-        def _validate(m: Dict[str, Any]) -> str:
-            # 轻量校验：至少要有 summary 与 events（否则后续不可用）
-            if not str(m.get("summary", "") or "").strip():
-                return "missing_or_empty_summary"
-            ev = m.get("events")
-            if not isinstance(ev, list) or len(ev) == 0:
-                return "missing_or_empty_events"
-            return ""
-
-        if logger:
-            model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
-            with logger.llm_call(
-                node="memory",
+        mem = None
+        prefetch = _take_prefetch(state)
+        if prefetch is not None:
+            fut, prefetched_text = prefetch
+            # 正文已变（例如又返工了一轮）则作废，按原流程同步抽取
+            if prefetched_text == writer_result:
+                try:
+                    mem = fut.result()
+                except Exception as e:
+                    if logger:
+                        logger.event(
+                            "memory_prefetch_failed",
+                            node="memory",
+                            chapter_index=chapter_index,
+                            error_type=e.__class__.__name__,
+                            error=str(e),
+                            action="fallback_sync_extract",
+                        )
+                    mem = None
+        if mem is None:
+            mem = _llm_extract_memory(
+                state,
+                llm,
                 chapter_index=chapter_index,
-                messages=[system, human],
-                model=model,
-                base_url=str(getattr(llm, "base_url", "") or ""),
-            ):
-                mem, _raw, _fr, _usage = invoke_json_with_repair(
-                    llm=llm,
-                    messages=[system, human],
-                    schema_text=schema_text,
-                    node="memory",
-                    chapter_index=chapter_index,
-                    logger=logger,
-                    max_attempts=int(state.get("llm_max_attempts", 3) or 3),
-                    base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
-                    validate=_validate,
-                )
-        else:
-            mem, _raw, _fr, _usage = invoke_json_with_repair(
-                llm=llm,
-                messages=[system, human],
-                schema_text=schema_text,
-                node="memory",
-                chapter_index=chapter_index,
-                logger=None,
-                max_attempts=int(state.get("llm_max_attempts", 3) or 3),
-                base_sleep_s=float(state.get("llm_retry_base_sleep_s", 1.0) or 1.0),
-                validate=_validate,
+                project_name=project_name,
+                writer_result=writer_result,
+                logger=logger,
             )
 
         mem["chapter_index"] = chapter_index
@@ -6,7 +6,7 @@ from typing import Any, Dict, Optional, List
 
 from state import StoryState
 from debug_log import truncate_text
-from llm_meta import extract_finish_reason_and_usage
+from llm_meta import extract_finish_reason_and_usage, llm_identity
 from json_utils import extract_first_json_object
 from llm_call import invoke_with_retry
 from llm_json import invoke_json_with_repair
@@ -41,6 +41,15 @@ def _looks_like_idea_pack(text: str) -> bool:
     return hit >= 2 or ("项目名称" in s and "点子" in s) or ("文风" in s and "点子" in s)
 
 
+# 点子包兜底解析用到的行级正则：模块加载时编译一次（原先每行都会重新拼接/编译）
+_TOP_LABELS = ("项目名称", "小说名称", "书名", "标题", "文风", "风格", "段落规则", "段落风格", "点子", "创意", "概要")
+_TOP_LABEL_RE = re.compile(rf"^\s*(?:{'|'.join(re.escape(x) for x in _TOP_LABELS)})\s*[:：]\s*")
+_KV_LINE_RE = re.compile(
+    r"^(项目名称|小说名称|书名|标题|文风|风格|段落规则|段落风格|paragraph_rules|style_override)\s*[:：]\s*(.+)$", re.I
+)
+_KV_PREFIX_RE = re.compile(r"^(项目名称|小说名称|书名|标题|文风|风格|段落规则|段落风格)\s*[:：]")
+
+
 def _parse_idea_pack_fallback(text: str) -> Dict[str, str]:
     """
     无 LLM 兜底：从常见 Markdown/键值格式中抽取：
@@ -53,16 +62,17 @@ def _parse_idea_pack_fallback(text: str) -> Dict[str, str]:
     if not s:
         return {"project_name": "", "idea": "", "style_override": "", "paragraph_rules": ""}
 
+    # 全文只切一次行；各段解析共用
+    lines = s.splitlines()
+
     # 0) 支持“块标签”格式：点子：<多行> / 段落规则：<多行>
     #    规则：从 `标签:` 起，读取后续行，直到遇到下一个顶层标签或 EOF。
-    top_labels = ("项目名称", "小说名称", "书名", "标题", "文风", "风格", "段落规则", "段落风格", "点子", "创意", "概要")
-
     def _extract_block(label: str) -> str:
-        lines = s.splitlines()
+        label_re = re.compile(rf"^\s*{re.escape(label)}\s*[:：]\s*(.*)\s*$")
         start_i: int | None = None
         first_line_value = ""
         for i, line in enumerate(lines):
-            m = re.match(rf"^\s*{re.escape(label)}\s*[:：]\s*(.*)\s*$", line.strip())
+            m = label_re.match(line.strip())
             if not m:
                 continue
             start_i = i
@@ -75,18 +85,18 @@ def _parse_idea_pack_fallback(text: str) -> Dict[str, str]:
             buf.append(first_line_value)
         for j in range(start_i + 1, len(lines)):
             ln = lines[j]
-            if re.match(rf"^\s*(?:{'|'.join([re.escape(x) for x in top_labels])})\s*[:：]\s*", ln.strip()):
+            if _TOP_LABEL_RE.match(ln.strip()):
                 break
             buf.append(ln.rstrip())
         return "\n".join(buf).strip()
 
     # 1) 键值行：xxx: yyy / xxx：yyy
     kv = {}
-    for line in s.splitlines():
+    for line in lines:
         line = line.strip()
         if not line or line.startswith("#"):
             continue
-        m = re.match(r"^(项目名称|小说名称|书名|标题|文风|风格|段落规则|段落风格|paragraph_rules|style_override)\s*[:：]\s*(.+)$", line, re.I)
+        m = _KV_LINE_RE.match(line)
         if not m:
             continue
         k = m.group(1).strip().lower()
@@ -137,8 +147,8 @@ def _parse_idea_pack_fallback(text: str) -> Dict[str, str]:
     if not idea:
         # 去掉 kv 行
         filtered_lines = []
-        for line in s.splitlines():
-            if re.match(r"^(项目名称|小说名称|书名|标题|文风|风格|段落规则|段落风格)\s*[:：]", line.strip()):
+        for line in lines:
+            if _KV_PREFIX_RE.match(line.strip()):
                 continue
             filtered_lines.append(line)
         idea = "\n".join(filtered_lines).strip()
@@ -413,13 +423,13 @@ def planner_agent(state: StoryState) -> StoryState:
 
         if logger:
             cfg = getattr(getattr(llm, "client", None), "base_url", None)
-            model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+            model, base_url = llm_identity(llm)
             with logger.llm_call(
                 node="planner",
                 chapter_index=chapter_index,
                 messages=[system, human],
                 model=model,
-                base_url=str(getattr(llm, "base_url", "") or cfg or ""),
+                base_url=base_url or str(cfg or ""),
             ):
                 planner_result, _rawm, _frm, _usm = invoke_json_with_repair(
                     llm=llm,
@@ -8,6 +8,8 @@ from debug_log import truncate_text
 from json_utils import extract_first_json_object, extract_first_json_object_with_error
 from storage import load_canon_bundle
 from llm_json import invoke_json_with_repair
+from llm_meta import llm_identity
+from planner_tasks import planner_task_instruction
 
 
 def _extract(text: str) -> Dict[str, Any]:
@@ -37,56 +39,7 @@ def screenwriter_agent(state: StoryState) -> StoryState:
     planner_result = state.get("planner_result") or {}
     project_name = str((planner_result or {}).get("项目名称", "") or "")
 
-    instr = ""
-    try:
-        tasks = planner_result.get("任务列表") if isinstance(planner_result, dict) else []
-        if isinstance(tasks, list):
-            for t in tasks:
-                if not isinstance(t, dict):
-                    continue
-                if str(t.get("任务名称", "") or "").strip() == "主线脉络":
-                    instr = str(t.get("任务指令", "") or "").strip()
-                    break
-    except Exception:
-        instr = ""
-
-    project_dir = str(state.get("project_dir", "") or "")
-    canon = load_canon_bundle(project_dir) if project_dir else {"world": {}, "characters": {}, "timeline": {}, "style": ""}
-    canon_world = canon.get("world") if isinstance(canon.get("world"), dict) else {}
-    canon_chars = canon.get("characters") if isinstance(canon.get("characters"), dict) else {}
-    canon_text = truncate_text(
-        json.dumps({"world": canon_world, "characters": canon_chars}, ensure_ascii=False, indent=2),
-        max_chars=4500,
-    )
-
-    # 现有细纲提示（用于分块续写时保持连续性；可选）
-    outline_hint = ""
-    try:
-        mb = state.get("materials_bundle")
-        if isinstance(mb, dict) and mb:
-            out0 = mb.get("outline") if isinstance(mb.get("outline"), dict) else {}
-            if isinstance(out0, dict) and out0:
-                chs = out0.get("chapters") if isinstance(out0.get("chapters"), list) else []
-                last = []
-                for it in chs[-5:]:
-                    if isinstance(it, dict):
-                        last.append(
-                            {
-                                "chapter_index": it.get("chapter_index"),
-                                "title": it.get("title", ""),
-                                "arc_id": it.get("arc_id", ""),
-                                "arc_title": it.get("arc_title", ""),
-                                "ending_hook": it.get("ending_hook", ""),
-                            }
-                        )
-                hint_obj = {
-                    "main_arc": out0.get("main_arc", ""),
-                    "themes": out0.get("themes", []),
-                    "last_chapters": last,
-                }
-                outline_hint = truncate_text(json.dumps(hint_obj, ensure_ascii=False, indent=2), max_chars=1800)
-    except Exception:
-        outline_hint = ""
+    instr = planner_task_instruction(planner_result, "主线脉络")
 
     llm = state.get("llm")
     if llm:
@@ -107,6 +60,45 @@ def screenwriter_agent(state: StoryState) -> StoryState:
     outline_end = max(outline_start, min(int(chapters_total), outline_end))
     if llm:
         required_range = f"{outline_start}..{outline_end}"
+        # Canon/已有细纲只用于拼 prompt：模板模式不读盘、不序列化
+        project_dir = str(state.get("project_dir", "") or "")
+        canon = load_canon_bundle(project_dir) if project_dir else {"world": {}, "characters": {}, "timeline": {}, "style": ""}
+        canon_world = canon.get("world") if isinstance(canon.get("world"), dict) else {}
+        canon_chars = canon.get("characters") if isinstance(canon.get("characters"), dict) else {}
+        canon_text = truncate_text(
+            json.dumps({"world": canon_world, "characters": canon_chars}, ensure_ascii=False, indent=2),
+            max_chars=4500,
+        )
+
+        # 现有细纲提示（用于分块续写时保持连续性；可选）
+        outline_hint = ""
+        try:
+            mb = state.get("materials_bundle")
+            if isinstance(mb, dict) and mb:
+                out0 = mb.get("outline") if isinstance(mb.get("outline"), dict) else {}
+                if isinstance(out0, dict) and out0:
+                    chs = out0.get("chapters") if isinstance(out0.get("chapters"), list) else []
+                    last = []
+                    for it in chs[-5:]:
+                        if isinstance(it, dict):
+                            last.append(
+                                {
+                                    "chapter_index": it.get("chapter_index"),
+                                    "title": it.get("title", ""),
+                                    "arc_id": it.get("arc_id", ""),
+                                    "arc_title": it.get("arc_title", ""),
+                                    "ending_hook": it.get("ending_hook", ""),
+                                }
+                            )
+                    hint_obj = {
+                        "main_arc": out0.get("main_arc", ""),
+                        "themes": out0.get("themes", []),
+                        "last_chapters": last,
+                    }
+                    outline_hint = truncate_text(json.dumps(hint_obj, ensure_ascii=False, indent=2), max_chars=1800)
+        except Exception:
+            outline_hint = ""
+
         system = SystemMessage(
             content=(
                 "你是小说项目的“编剧”，负责主线与章节细纲。\n"
@@ -197,13 +189,13 @@ def screenwriter_agent(state: StoryState) -> StoryState:
             return ""
 
         if logger:
-            model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+            model, base_url = llm_identity(llm)
             with logger.llm_call(
                 node="screenwriter",
                 chapter_index=0,
                 messages=[system, human],
                 model=model,
-                base_url=str(getattr(llm, "base_url", "") or ""),
+                base_url=base_url,
             ):
                 obj, _raw, _fr, _usage = invoke_json_with_repair(
                     llm=llm,
@@ -6,10 +6,11 @@ from typing import Any, Dict
 from state import StoryState
 from debug_log import truncate_text
 from json_utils import extract_first_json_object
-from llm_meta import extract_finish_reason_and_usage
+from llm_meta import extract_finish_reason_and_usage, llm_identity
 from storage import load_canon_bundle
 from llm_call import invoke_with_retry
 from llm_json import invoke_json_with_repair
+from planner_tasks import planner_task_instruction
 
 
 def _extract(text: str) -> Dict[str, Any]:
@@ -32,25 +33,7 @@ def tone_agent(state: StoryState) -> StoryState:
     planner_result = state.get("planner_result") or {}
     project_name = str((planner_result or {}).get("项目名称", "") or "")
 
-    instr = ""
-    try:
-        tasks = planner_result.get("任务列表") if isinstance(planner_result, dict) else []
-        if isinstance(tasks, list):
-            for t in tasks:
-                if not isinstance(t, dict):
-                    continue
-                if str(t.get("任务名称", "") or "").strip() == "开篇基调":
-                    instr = str(t.get("任务指令", "") or "").strip()
-                    break
-    except Exception:
-        instr = ""
-
-    # 兼容：canon/style.md 已废弃为主来源；若存在则仅作为“历史项目风格补充”
-    project_dir = str(state.get("project_dir", "") or "")
-    canon = load_canon_bundle(project_dir) if project_dir else {"world": {}, "characters": {}, "timeline": {}, "style": ""}
-    legacy_style_text = truncate_text(str(canon.get("style", "") or ""), max_chars=1600)
-    user_style = truncate_text(str(state.get("style_override", "") or ""), max_chars=1200)
-    paragraph_rules = truncate_text(str(state.get("paragraph_rules", "") or ""), max_chars=800)
+    instr = planner_task_instruction(planner_result, "开篇基调")
 
     llm = state.get("llm")
     if llm:
@@ -62,15 +45,23 @@ def tone_agent(state: StoryState) -> StoryState:
             llm = None
 
     if llm:
+        # 兼容：canon/style.md 已废弃为主来源；若存在则仅作为“历史项目风格补充”
+        # （只用于拼 prompt：模板模式不读盘）
+        project_dir = str(state.get("project_dir", "") or "")
+        canon = load_canon_bundle(project_dir) if project_dir else {"world": {}, "characters": {}, "timeline": {}, "style": ""}
+        legacy_style_text = truncate_text(str(canon.get("style", "") or ""), max_chars=1600)
+        user_style = truncate_text(str(state.get("style_override", "") or ""), max_chars=1200)
+        paragraph_rules = truncate_text(str(state.get("paragraph_rules", "") or ""), max_chars=800)
+
         def _invoke_once(node_name: str, system_msg: SystemMessage, human_msg: HumanMessage):
             if logger:
-                model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+                model, base_url = llm_identity(llm)
                 with logger.llm_call(
                     node=node_name,
                     chapter_index=0,
                     messages=[system_msg, human_msg],
                     model=model,
-                    base_url=str(getattr(llm, "base_url", "") or ""),
+                    base_url=base_url,
                 ):
                     return invoke_with_retry(
                         llm,
@@ -4,21 +4,22 @@ import json
 
 from state import StoryState
 from debug_log import truncate_text
-from storage import (
-    build_recent_arc_synopsis,
-    build_recent_memory_synopsis,
-    build_canon_text_for_context,
-    infer_arc_start_from_materials_bundle,
-    infer_current_arc_start,
-    load_canon_bundle,
-    load_recent_arc_summaries,
-    load_recent_chapter_memories,
-    normalize_canon_bundle,
-)
-from llm_meta import extract_finish_reason_and_usage
+from storage import load_canon_bundle, normalize_canon_bundle
+from prompt_context import context_blocks
+from llm_meta import extract_finish_reason_and_usage, llm_identity
 from materials import materials_prompt_digest
 from llm_call import invoke_with_retry
 
+try:
+    # 模块级导入一次；缺依赖时 writer_agent 退回模板正文（force_llm 时报错）
+    from langchain_core.messages import SystemMessage, HumanMessage
+
+    _HAS_LC = True
+except Exception:  # pragma: no cover
+    SystemMessage = HumanMessage = None  # type: ignore[assignment,misc]
+    _HAS_LC = False
+
+
 def writer_agent(state: StoryState) -> StoryState:
     """
     写手 Agent：
@@ -51,15 +52,10 @@ def writer_agent(state: StoryState) -> StoryState:
         opening_task = ""
 
     llm = state.get("llm")
-    if llm:
-        try:
-            from langchain_core.messages import SystemMessage, HumanMessage
-        except Exception as e:  # pragma: no cover
-            if state.get("force_llm", False):
-                raise RuntimeError(
-                    "已指定 LLM 模式，但无法导入 langchain_core.messages（请检查依赖安装/解释器环境）"
-                ) from e
-            llm = None
+    if llm and not _HAS_LC:
+        if state.get("force_llm", False):
+            raise RuntimeError("已指定 LLM 模式，但无法导入 langchain_core.messages（请检查依赖安装/解释器环境）")
+        llm = None
 
     if llm:
         if logger:
@@ -77,45 +73,18 @@ def writer_agent(state: StoryState) -> StoryState:
         include_unapproved = bool(state.get("include_unapproved_memories", False))
         arc_every_n = int(state.get("arc_every_n", 10) or 10)
         arc_k = int(state.get("arc_recent_k", 2) or 2)
-        # 优先用“细纲的卷/副本结构（arc_id）”推断本卷范围；失败再回退到 arc summary / 分桶
-        arc_start = None
-        try:
-            mb = state.get("materials_bundle")
-            if isinstance(mb, dict) and mb:
-                arc_start = infer_arc_start_from_materials_bundle(mb, chapter_index=chapter_index)
-        except Exception:
-            arc_start = None
-        if not arc_start:
-            arc_start = infer_current_arc_start(project_dir, chapter_index=chapter_index, arc_every_n=arc_every_n) if project_dir else 1
-        recent_memories = (
-            load_recent_chapter_memories(
-                project_dir,
-                before_chapter=chapter_index,
-                k=k,
-                include_unapproved=include_unapproved,
-                min_chapter=arc_start,  # 仅注入“本卷/本副本内”的近期记忆，旧卷走 arc_summary
-            )
-            if project_dir
-            else []
-        )
-        arc_text = ""
-        if bool(state.get("enable_arc_summary", True)) and project_dir:
-            arcs = load_recent_arc_summaries(project_dir, before_chapter=chapter_index, k=arc_k)
-            arc_text = truncate_text(build_recent_arc_synopsis(arcs), max_chars=1400)
-        canon_text = (
-            build_canon_text_for_context(
-                project_dir,
-                chapter_index=chapter_index,
-                arc_every_n=arc_every_n,
-                arc_recent_k=arc_k,
-                include_unapproved=include_unapproved,
-                materials_bundle=(state.get("materials_bundle") if isinstance(state.get("materials_bundle"), dict) else None),
-                max_chars=6000,
-            )
-            if project_dir
-            else "（无）"
+        # 与主编共用上下文缓存：同章返工/审稿时 Canon、记忆未变就不再重新读盘与序列化
+        mb = state.get("materials_bundle")
+        canon_text, memories_text, arc_text = context_blocks(
+            project_dir,
+            chapter_index=chapter_index,
+            k=k,
+            include_unapproved=include_unapproved,
+            arc_every_n=arc_every_n,
+            arc_k=arc_k,
+            enable_arc_summary=bool(state.get("enable_arc_summary", True)),
+            materials_bundle=mb if isinstance(mb, dict) and mb else None,
         )
-        memories_text = truncate_text(build_recent_memory_synopsis(recent_memories), max_chars=1200)
 
         # === 2.0：阶段3材料包（优先于 planner 参考，用于“本章细纲/人物卡/基调”硬约束） ===
         materials_bundle = state.get("materials_bundle") or {}
@@ -298,13 +267,13 @@ def writer_agent(state: StoryState) -> StoryState:
                 )
             )
         if logger:
-            model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+            model, base_url = llm_identity(llm)
             with logger.llm_call(
                 node="writer",
                 chapter_index=chapter_index,
                 messages=[system, human],
                 model=model,
-                base_url=str(getattr(llm, "base_url", "") or ""),
+                base_url=base_url,
                 extra={"writer_version": writer_version, "is_rewrite": is_rewrite},
             ):
                 resp = invoke_with_retry(
@@ -379,13 +348,13 @@ def writer_agent(state: StoryState) -> StoryState:
                     )
                 )
                 if logger:
-                    model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+                    model, base_url = llm_identity(llm)
                     with logger.llm_call(
                         node="writer_continue",
                         chapter_index=chapter_index,
                         messages=[system2, human2],
                         model=model,
-                        base_url=str(getattr(llm, "base_url", "") or ""),
+                        base_url=base_url,
                         extra={"writer_version": writer_version},
                     ):
                         resp2 = invoke_with_retry(
@@ -463,13 +432,13 @@ def writer_agent(state: StoryState) -> StoryState:
                 )
             )
             if logger:
-                model = getattr(llm, "model_name", None) or getattr(llm, "model", None)
+                model, base_url = llm_identity(llm)
                 with logger.llm_call(
                     node="writer_shorten",
                     chapter_index=chapter_index,
                     messages=[system3, human3],
                     model=model,
-                    base_url=str(getattr(llm, "base_url", "") or ""),
+                    base_url=base_url,
                     extra={"writer_version": writer_version},
                 ):
                     resp3 = invoke_with_retry(
@@ -2,11 +2,12 @@ from __future__ import annotations
 
 import json
 import os
+import threading
 import time
 import traceback
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional, Tuple
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
 
 
 def _now_iso() -> str:
@@ -21,8 +22,64 @@ def _truncate(s: str, max_chars: int) -> str:
     return s[: max_chars - 50] + "\n...[truncated]...\n" + s[-50:]
 
 
+# 超长文本截断结果缓存：(id(text), max_chars) -> (text, 结果)。同一段风格/重写指导/正文在多轮返工、
+# 多个节点间反复截断时直接复用；持有强引用并做 `is` 校验（不对长文本求哈希）。
+_TRUNCATE_CACHE: Dict[Tuple[int, int], Tuple[str, str]] = {}
+_TRUNCATE_CACHE_MAX = 16
+
+
 def truncate_text(text: str, max_chars: int = 20000) -> str:
-    return _truncate(text or "", max_chars=max_chars)
+    s = text or ""
+    if len(s) <= max_chars:
+        return s
+    k = (id(s), max_chars)
+    hit = _TRUNCATE_CACHE.get(k)
+    if hit is not None and hit[0] is s:
+        return hit[1]
+    out = _truncate(s, max_chars=max_chars)
+    if len(_TRUNCATE_CACHE) >= _TRUNCATE_CACHE_MAX:
+        _TRUNCATE_CACHE.clear()
+    _TRUNCATE_CACHE[k] = (s, out)
+    return out
+
+
+_SENTENCE_ENDS = ("\n", "。", "！", "？", "!", "?")
+
+
+def truncate_middle(text: str, max_chars: int) -> str:
+    """
+    超长正文按固定预算截断：保留开头与结尾（约各一半），省略中间，并尽量在句末/换行处断开。
+    结果确定（同输入同输出），总长不超过 max_chars；未超长原样返回。
+    """
+    s = text or ""
+    n = len(s)
+    if n <= max_chars:
+        return s
+    # 按最长可能的标记预留长度（省略字数不会超过 n 的位数）
+    budget = max(0, max_chars - len(f"\n…[中间省略 {n} 字]…\n"))
+    head_n = budget - budget // 2
+    tail_n = budget // 2
+    head = s[:head_n]
+    cut = max(head.rfind(ch) for ch in _SENTENCE_ENDS)
+    # 断点离预算太远（超过一半）就不吸附，避免丢太多内容
+    if cut >= head_n // 2:
+        head = head[: cut + 1]
+    tail = s[n - tail_n :] if tail_n else ""
+    starts = [p for p in (tail.find(ch) for ch in _SENTENCE_ENDS) if p >= 0]
+    if starts and min(starts) < tail_n // 2:
+        tail = tail[min(starts) + 1 :]
+    return f"{head}\n…[中间省略 {n - len(head) - len(tail)} 字]…\n{tail}"
+
+
+def _no_event(event: str, **data: Any) -> None:
+    return None
+
+
+def event_sink(logger: Any) -> Callable[..., None]:
+    """
+    节点内多处打点时用：有 logger 返回其 event（绑定一次），否则返回空操作，调用处不必反复判断 logger。
+    """
+    return logger.event if logger else _no_event
 
 
 def _preview_text(s: str, preview_chars: int) -> str:
@@ -81,6 +138,8 @@ class RunLogger:
     preview_chars: int = 100
     payload_dirname: str = "debug_payloads"
     _seq: int = field(default=0, init=False, repr=False)
+    # 专家节点可能并发写日志：event() 串行化，保证 jsonl 行与 payload 序号不交错
+    _lock: Any = field(default_factory=threading.RLock, init=False, repr=False)
 
     def _write_to_path(self, path: str, obj: Dict[str, Any]) -> None:
         if not self.enabled:
@@ -168,24 +227,15 @@ class RunLogger:
         fname = f"{ts}_{self._seq:04d}_{_safe_filename(hint)}.{ext}"
         full_path = os.path.join(self._payload_dir(), fname)
         try:
-            if ext == "txt":
-                text = str(content or "")
-                with open(full_path, "w", encoding="utf-8") as f:
-                    f.write(text)
-                size_bytes = os.path.getsize(full_path) if os.path.exists(full_path) else 0
-                return {
-                    "full_path": os.path.relpath(full_path, os.path.dirname(self.path)).replace("\\", "/"),
-                    "chars": len(text),
-                    "bytes": int(size_bytes),
-                }
-            # json
-            with open(full_path, "w", encoding="utf-8") as f:
-                f.write(json.dumps(content, ensure_ascii=False))
-            size_bytes = os.path.getsize(full_path) if os.path.exists(full_path) else 0
+            # 序列化/编码各只做一次，按字节原样写入；字节数直接取自编码结果（不再回读文件大小）
+            text = str(content or "") if ext == "txt" else json.dumps(content, ensure_ascii=False)
+            data = text.encode("utf-8")
+            with open(full_path, "wb") as f:
+                f.write(data)
             return {
                 "full_path": os.path.relpath(full_path, os.path.dirname(self.path)).replace("\\", "/"),
-                "chars": len(json.dumps(content, ensure_ascii=False)),
-                "bytes": int(size_bytes),
+                "chars": len(text),
+                "bytes": len(data),
             }
         except Exception:
             return {"full_path": "", "chars": 0, "bytes": 0}
@@ -261,15 +311,25 @@ class RunLogger:
         # 其他类型不处理
         return obj
 
+    def enabled_for(self, event: str = "") -> bool:
+        """
+        调用方在拼装大量事件字段前先问一句；目前只有全局开关，event 预留给按事件过滤。
+        """
+        return bool(self.enabled)
+
     def event(self, event: str, **data: Any) -> None:
-        obj = {"ts": _now_iso(), "event": event, **data}
-        # 统一压缩：避免 llm request/response/traceback 等把 jsonl 冲爆
-        try:
-            obj = self._compact_inplace(obj, hint_prefix=str(event))
-        except Exception:
-            pass
-        self._write(obj)
-        self._write_index(obj)
+        # 关闭时什么都不做：否则长字段仍会走压缩流程、把 payload 全量写盘
+        if not self.enabled:
+            return
+        with self._lock:
+            obj = {"ts": _now_iso(), "event": event, **data}
+            # 统一压缩：避免 llm request/response/traceback 等把 jsonl 冲爆
+            try:
+                obj = self._compact_inplace(obj, hint_prefix=str(event))
+            except Exception:
+                pass
+            self._write(obj)
+            self._write_index(obj)
 
     def span(self, name: str, **data: Any):
         return _Span(self, name=name, data=data)
@@ -347,6 +407,9 @@ class _LLMCall:
 
     def __enter__(self):
         self.t0 = time.perf_counter()
+        if not self.logger.enabled_for("llm_request"):
+            # 日志关闭时不序列化整段 messages（参数在调用 event 之前就会求值）
+            return self
         self.logger.event(
             "llm_request",
             node=self.node,
@@ -3,7 +3,116 @@ from __future__ import annotations
 import json
 import re
 import ast
-from typing import Any, Dict, Tuple
+from typing import Any, Dict, List, Tuple, Union
+
+try:
+    import orjson as _orjson  # 可选加速：未安装时回退标准库 json
+except ImportError:  # pragma: no cover
+    _orjson = None
+
+# 每次解析 LLM 输出都会用到的修复正则：模块级预编译，避免每次经 re 模块缓存查找
+_FENCE_HEAD_RE = re.compile(r"(?is)^```(?:json)?\s*")
+_FENCE_TAIL_RE = re.compile(r"(?is)\s*```$")
+_TRAILING_COMMA_RE = re.compile(r",\s*(\}|\])")
+# budget_json 的流式编码器：紧凑分隔符，中文原样输出
+_COMPACT_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+# 括号扫描关心的结构字符
+_STRUCT_CHAR_RE = re.compile(r'[{}"\\]')
+
+
+def _loads(s: Union[str, bytes]) -> Any:
+    """
+    优先用 orjson 解析（更快）；orjson 拒绝的输入（如 NaN）再交给标准库，
+    以保持原有的容错范围与错误信息（错误信息会回传给 LLM 修复器）。
+    """
+    if _orjson is not None:
+        try:
+            return _orjson.loads(s)
+        except _orjson.JSONDecodeError:
+            pass
+    return json.loads(s.decode("utf-8") if isinstance(s, bytes) else s)
+
+
+def loads_json(data: Union[str, bytes]) -> Any:
+    """
+    解析一段完整 JSON（读盘/缓存用，不做任何容错抽取）；失败抛异常，由调用方兜底。
+    bytes 直接交给 orjson，省掉一次 UTF-8 解码成 str 的拷贝。
+    """
+    return _loads(data)
+
+
+def dumps_compact(obj: Any) -> str:
+    """
+    等价于 json.dumps(obj, ensure_ascii=False, separators=(",", ":"))：不带缩进/空格，
+    拼进 prompt 时同样的字符预算能装下更多实际内容。orjson 默认即紧凑输出。
+    """
+    if _orjson is not None:
+        try:
+            return _orjson.dumps(obj, option=_orjson.OPT_NON_STR_KEYS).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def budget_json(obj: Any, max_chars: int) -> str:
+    """
+    带字符预算的紧凑 JSON（顶层为对象）：流式编码，攒够 max_chars 即停，不再序列化剩余部分；
+    超预算时回退到最后一个完整闭合的子结构并补齐括号，保证输出仍是合法 JSON（长度不超过 max_chars）。
+    放不下任何完整子结构时返回空字符串。
+    """
+    limit = max(0, int(max_chars))
+    chunks: List[str] = []
+    n = 0
+    for chunk in _COMPACT_ENCODER.iterencode(obj):
+        chunks.append(chunk)
+        n += len(chunk)
+        if n > limit:
+            break
+    else:
+        return "".join(chunks)
+    text = "".join(chunks)
+    cut = limit
+    while cut > 0:
+        out = close_truncated_json_object(text[:cut])
+        if len(out) <= limit:
+            return out
+        # 补齐的括号超出预算：按超出量再往前收一点
+        cut -= len(out) - limit
+    return ""
+
+
+def _first_object_snippet(s: str) -> str:
+    """
+    截取第一个顶层 {...}：走到括号闭合即停（忽略字符串内的花括号、处理转义），
+    不再处理其后的解释文字；未闭合（截断）时退回“第一个 { 到最后一个 }”的宽松切片。
+    用预编译正则直接跳到下一个结构字符（{ } " \\），普通文字不进 Python 循环。
+    """
+    start = s.find("{")
+    if start < 0:
+        return ""
+    depth = 0
+    in_str = False
+    esc_at = -1  # 被反斜杠转义的字符位置
+    for m in _STRUCT_CHAR_RE.finditer(s, start):
+        i = m.start()
+        if i == esc_at:
+            continue
+        ch = s[i]
+        if in_str:
+            if ch == "\\":
+                esc_at = i + 1
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch == "{":
+            depth += 1
+        elif ch == "}":
+            depth -= 1
+            if depth == 0:
+                return s[start : i + 1]
+    end = s.rfind("}")
+    return s[start : end + 1] if end > start else ""
 
 
 def extract_first_json_object(text: str) -> Dict[str, Any]:
@@ -15,27 +124,119 @@ def extract_first_json_object(text: str) -> Dict[str, Any]:
     - 只返回 dict；若解析到的不是 dict 或解析失败，则返回空 dict
     """
     s = (text or "").strip()
-    if not s:
+    # 没有 { 就不可能解析出 dict：直接返回，省掉一次注定失败的 loads
+    if not s or "{" not in s:
         return {}
 
     # 1) 直接解析（最理想：LLM 只输出 JSON）
     try:
-        obj = json.loads(s)
+        obj = _loads(s)
         return obj if isinstance(obj, dict) else {}
     except Exception:
         pass
 
     # 2) 抽取第一个 {...} 片段（容错：LLM 多说了话 / 包了代码块）
-    m = re.search(r"\{[\s\S]*\}", s)
-    if not m:
+    snippet = _first_object_snippet(s)
+    if not snippet:
         return {}
     try:
-        obj = json.loads(m.group(0))
+        obj = _loads(snippet)
         return obj if isinstance(obj, dict) else {}
     except Exception:
         return {}
 
 
+def close_truncated_json_object(text: str) -> str:
+    """
+    被截断（finish_reason=length）的 JSON 对象：回退到最后一个已闭合的 }/] 处，
+    去掉悬空的逗号，再按当时仍未闭合的括号补齐，得到“截至目前已完整生成部分”的合法 JSON 文本。
+    找不到第一个 { 或还没有任何子结构闭合时返回空字符串。
+    """
+    s = text or ""
+    start = s.find("{")
+    if start < 0:
+        return ""
+    stack: List[str] = []
+    in_str = False
+    esc = False
+    cut = -1
+    cut_stack: List[str] = []
+    for i in range(start, len(s)):
+        ch = s[i]
+        if in_str:
+            if esc:
+                esc = False
+            elif ch == "\\":
+                esc = True
+            elif ch == '"':
+                in_str = False
+        elif ch == '"':
+            in_str = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            if not stack:
+                break
+            stack.pop()
+            if not stack:
+                # 已完整闭合，不是截断
+                return s[start : i + 1]
+            cut = i + 1
+            cut_stack = list(stack)
+    if cut < 0:
+        return ""
+    head = s[start:cut].rstrip()
+    return head + "".join(reversed(cut_stack))
+
+
+class JsonObjectScanner:
+    """
+    增量括号扫描器：逐段喂入文本，检测“第一个顶层 {...} 是否已闭合”。
+    - 忽略字符串内部的花括号，处理转义
+    - 用于流式读取 LLM 输出时提前停止（对象闭合后的内容对解析无用）
+    """
+
+    def __init__(self) -> None:
+        self.depth = 0
+        self.started = False
+        self.closed = False
+        self._in_str = False
+        self._esc = False
+
+    def feed(self, chunk: str) -> bool:
+        if self.closed:
+            return True
+        if not chunk:
+            return False
+        # 与 _first_object_snippet 相同：只在结构字符间跳转；上一段以反斜杠结尾时本段首字符被转义
+        esc_at = 0 if self._esc else -1
+        self._esc = False
+        for m in _STRUCT_CHAR_RE.finditer(chunk):
+            i = m.start()
+            if i == esc_at:
+                continue
+            ch = chunk[i]
+            if self._in_str:
+                if ch == "\\":
+                    esc_at = i + 1
+                elif ch == '"':
+                    self._in_str = False
+                continue
+            if ch == '"':
+                if self.started:
+                    self._in_str = True
+            elif ch == "{":
+                self.depth += 1
+                self.started = True
+            elif ch == "}" and self.started:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.closed = True
+                    return True
+        self._esc = esc_at == len(chunk)
+        return False
+
+
 def extract_first_json_object_with_error(text: str) -> Tuple[Dict[str, Any], str]:
     """
     与 extract_first_json_object 类似，但会返回解析失败原因（用于“把错误反馈给 LLM 修复”）。
@@ -48,13 +249,13 @@ def extract_first_json_object_with_error(text: str) -> Tuple[Dict[str, Any], str
     def _strip_code_fence(x: str) -> str:
         x = (x or "").strip()
         # ```json ... ``` / ``` ... ```
-        x = re.sub(r"(?is)^```(?:json)?\s*", "", x)
-        x = re.sub(r"(?is)\s*```$", "", x)
+        x = _FENCE_HEAD_RE.sub("", x)
+        x = _FENCE_TAIL_RE.sub("", x)
         return x.strip()
 
     def _remove_trailing_commas(x: str) -> str:
         # 移除 }/]/, 前的尾逗号（常见 JSON 错误）
-        x = re.sub(r",\s*(\}|\])", r"\1", x)
+        x = _TRAILING_COMMA_RE.sub(r"\1", x)
         return x
 
     def _try_ast_eval_jsonish(x: str) -> Dict[str, Any]:
@@ -69,34 +270,32 @@ def extract_first_json_object_with_error(text: str) -> Tuple[Dict[str, Any], str
         except Exception:
             return {}
 
-    # 1) 直接解析（先去代码块与尾逗号）
+    # 1) 直接解析（先去代码块与尾逗号）；去代码块的结果与 ast 兜底共用，长输出不重复扫描
+    s_unfenced = _strip_code_fence(s)
     try:
-        s0 = _strip_code_fence(s)
-        s0 = _remove_trailing_commas(s0)
-        obj = json.loads(s0)
+        obj = _loads(_remove_trailing_commas(s_unfenced))
         if isinstance(obj, dict):
             return obj, ""
         return {}, f"json_root_not_object(type={type(obj).__name__})"
     except Exception as e1:
         err1 = f"json_loads_failed: {e1.__class__.__name__}: {str(e1)}"
         # ast 兜底（本地宽松修复）
-        obj_ast = _try_ast_eval_jsonish(_strip_code_fence(s))
+        obj_ast = _try_ast_eval_jsonish(s_unfenced)
         if obj_ast:
             return obj_ast, ""
 
     # 2) 抽取第一个 {...} 片段
-    m = re.search(r"\{[\s\S]*\}", s)
-    if not m:
+    snippet = _first_object_snippet(s)
+    if not snippet:
         return {}, err1 + " ; no_object_braces_found"
-    snippet = m.group(0)
+    snippet_unfenced = _strip_code_fence(snippet)
     try:
-        snippet0 = _remove_trailing_commas(_strip_code_fence(snippet))
-        obj = json.loads(snippet0)
+        obj = _loads(_remove_trailing_commas(snippet_unfenced))
         if isinstance(obj, dict):
             return obj, ""
         return {}, f"extracted_json_root_not_object(type={type(obj).__name__})"
     except Exception as e2:
-        obj_ast2 = _try_ast_eval_jsonish(_strip_code_fence(snippet))
+        obj_ast2 = _try_ast_eval_jsonish(snippet_unfenced)
         if obj_ast2:
             return obj_ast2, ""
         return {}, err1 + f" ; extracted_json_loads_failed: {e2.__class__.__name__}: {str(e2)}"
@@ -0,0 +1,63 @@
+from __future__ import annotations
+
+import copy
+import hashlib
+import os
+from typing import Any, Dict, List, Optional
+
+from storage import read_json, write_json
+
+# 进程内结果缓存：prompt 哈希 -> 已通过校验的解析结果（dict）。
+# 满了直接清空（与其它模块级缓存一致），避免长跑进程无限增长。
+_MEM_CACHE: Dict[str, Dict[str, Any]] = {}
+_MEM_CACHE_MAX = 64
+
+
+def prompt_cache_key(messages: List[Any], *, model: str = "", extra: str = "") -> str:
+    """
+    由 (模型名, 额外参数, 每条消息的类型+内容) 计算 blake2b 摘要，作为 LLM 结果缓存键。
+    extra 用于放入“不在 prompt 里但影响结果取舍”的参数（如校验阈值）。
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for part in (model, extra):
+        h.update(str(part or "").encode("utf-8"))
+        h.update(b"\x00")
+    for m in messages:
+        h.update(m.__class__.__name__.encode("utf-8"))
+        h.update(b"\x01")
+        h.update(str(getattr(m, "content", "") or "").encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+def cache_get(key: str, cache_dir: str = "") -> Optional[Dict[str, Any]]:
+    """
+    先查进程内缓存，再查磁盘（cache_dir/<key>.json）；命中返回深拷贝（调用方可随意修改），否则 None。
+    """
+    hit = _MEM_CACHE.get(key)
+    if hit is None and cache_dir:
+        obj = read_json(os.path.join(cache_dir, f"{key}.json"))
+        if isinstance(obj, dict) and obj:
+            hit = obj
+            _remember(key, obj)
+    return copy.deepcopy(hit) if hit is not None else None
+
+
+def cache_put(key: str, obj: Dict[str, Any], cache_dir: str = "") -> None:
+    """
+    写入进程内缓存；给了 cache_dir 时同时落盘（失败不影响主流程）。
+    """
+    if not isinstance(obj, dict) or not obj:
+        return
+    _remember(key, copy.deepcopy(obj))
+    if cache_dir:
+        try:
+            write_json(os.path.join(cache_dir, f"{key}.json"), obj)
+        except Exception:
+            pass
+
+
+def _remember(key: str, obj: Dict[str, Any]) -> None:
+    if len(_MEM_CACHE) >= _MEM_CACHE_MAX:
+        _MEM_CACHE.clear()
+    _MEM_CACHE[key] = obj
@@ -3,17 +3,25 @@ from __future__ import annotations
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from debug_log import truncate_text
-from json_utils import extract_first_json_object_with_error
+from json_utils import JsonObjectScanner, close_truncated_json_object, extract_first_json_object_with_error
 from llm_call import invoke_with_retry
 from llm_meta import extract_finish_reason_and_usage
 
+try:
+    from langchain_core.messages import AIMessageChunk as _AIMessageChunk
+    from langchain_core.messages.ai import add_ai_message_chunks as _add_ai_message_chunks
+except Exception:  # pragma: no cover
+    _AIMessageChunk = None
+    _add_ai_message_chunks = None
+
 
 def _safe_content(resp: Any) -> str:
     return (getattr(resp, "content", "") or "").strip()
 
 
 def _log_llm_response(logger: Any, *, node: str, chapter_index: int, content: str, finish_reason: str, token_usage: Dict[str, Any]):
-    if not logger:
+    # 日志关闭时连截断拷贝也不做（长输出的 truncate_text 会复制整段文本）
+    if not logger or (hasattr(logger, "enabled_for") and not logger.enabled_for("llm_response")):
         return
     try:
         logger.event(
@@ -27,6 +35,43 @@ def _log_llm_response(logger: Any, *, node: str, chapter_index: int, content: st
     except Exception:
         pass
 
+class _StreamUntilJSONClosed:
+    """
+    invoke 适配器：用 llm.stream 读取输出，第一个顶层 JSON 对象闭合即停止读取。
+    模型在 JSON 后追加解释/空白时可以少等这部分生成；不支持 stream 的对象退回 invoke。
+    """
+
+    def __init__(self, llm: Any):
+        self._llm = llm
+
+    def invoke(self, messages: List[Any]) -> Any:
+        stream = getattr(self._llm, "stream", None)
+        if not callable(stream):
+            return self._llm.invoke(messages)
+        scanner = JsonObjectScanner()
+        buf: List[Any] = []
+        for chunk in stream(messages):
+            buf.append(chunk)
+            if scanner.feed(str(getattr(chunk, "content", "") or "")):
+                break
+        return _merge_chunks(buf)
+
+
+def _merge_chunks(buf: List[Any]) -> Any:
+    """
+    读完再一次性合并分片：逐片 acc + chunk 会反复复制已累积的 content（长输出时近似 O(n^2)）。
+    全是 AIMessageChunk 时走 langchain 的批量合并；其它类型退回逐片相加。
+    """
+    if not buf:
+        return None
+    if _add_ai_message_chunks is not None and _AIMessageChunk is not None and all(isinstance(c, _AIMessageChunk) for c in buf):
+        return _add_ai_message_chunks(buf[0], *buf[1:])
+    acc = buf[0]
+    for c in buf[1:]:
+        acc = acc + c
+    return acc
+
+
 def bind_json_response_format(llm: Any) -> Any:
     """
     为支持 OpenAI 兼容 response_format 的模型启用 JSON Output：
@@ -51,11 +96,15 @@ def invoke_json_with_repair(
     base_sleep_s: float = 1.0,
     validate: Optional[Callable[[Dict[str, Any]], str]] = None,
     max_fix_chars: int = 12000,
+    stream: bool = False,
+    salvage_truncated: bool = False,
 ) -> Tuple[Dict[str, Any], str, str, Dict[str, Any]]:
     """
     调用 LLM 并解析第一个 JSON object：
-    - 第一次：正常调用 -> 解析
+    - 第一次：正常调用 -> 解析（stream=True 时流式读取，JSON 对象闭合即停止）
     - 如果解析失败（或 validate 不通过）：第二次调用“JSON 修复器”，把错误原因+原始输出回传给 LLM，只修格式/缺字段
+    - salvage_truncated=True（且提供了 validate）时，被截断的输出先本地补齐，补齐结果通过校验即直接返回；
+      此时 finish_reason 仍为 "length"，调用方据此区分“不完整但可用”的结果（例如不要写入结果缓存）
 
     返回：(obj, raw_text, finish_reason, token_usage)
     - obj 解析成功则为 dict，否则为空 dict
@@ -77,7 +126,7 @@ def invoke_json_with_repair(
         messages0 = messages
 
     resp = invoke_with_retry(
-        llm0,
+        _StreamUntilJSONClosed(llm0) if stream else llm0,
         messages0,
         max_attempts=max(1, int(max_attempts)),
         base_sleep_s=float(base_sleep_s),
@@ -105,6 +154,15 @@ def invoke_json_with_repair(
     if obj:
         return obj, raw, str(finish_reason or ""), token_usage or {}
 
+    # 区分“被截断”与“格式错误”：截断时修复器需精简内容才能闭合 JSON；格式错误只修格式
+    truncated = str(finish_reason or "").strip().lower() == "length"
+    if truncated and salvage_truncated and validate is not None:
+        # 先本地补齐：保留截断前已完整生成的部分（如前几条 issues），通过校验就省掉一次修复调用。
+        # 仅限显式开启且有校验的调用方：没有校验时无法判断残缺对象（如截断的任务列表）是否可用
+        partial, _perr = extract_first_json_object_with_error(close_truncated_json_object(raw))
+        if partial and not (validate(partial) or "").strip():
+            return partial, raw, str(finish_reason or ""), token_usage or {}
+
     # 第二次：把“解析/校验错误”回传给 LLM，要求只输出 JSON（并继续启用 response_format）
     try:
         from langchain_core.messages import SystemMessage, HumanMessage
@@ -124,7 +182,12 @@ def invoke_json_with_repair(
         content=(
             "解析/校验失败原因：\n"
             f"{err}\n\n"
-            "原始输出（需要修复为严格 JSON）：\n"
+            + (
+                "注意：原始输出因长度上限被截断（finish_reason=length）。请精简各字段内容（可减少条目），确保输出完整闭合的 JSON。\n\n"
+                if truncated
+                else ""
+            )
+            + "原始输出（需要修复为严格 JSON）：\n"
             f"{truncate_text(raw, max_chars=max_fix_chars)}\n\n"
             "请输出修复后的 JSON："
         )
@@ -27,3 +27,25 @@ def extract_finish_reason_and_usage(resp: Any) -> Tuple[Optional[str], Dict[str,
     return (str(finish_reason) if finish_reason is not None else None, usage)
 
 
+# llm 标识缓存：id -> (llm, (model, base_url))。ChatOpenAI 等 pydantic 对象不可哈希、不能做 WeakKey，
+# 因此与其它模块级缓存一样持有强引用并做 `is` 校验。
+_IDENTITY_CACHE: Dict[int, Tuple[Any, Tuple[Optional[str], str]]] = {}
+_IDENTITY_CACHE_MAX = 8
+
+
+def llm_identity(llm: Any) -> Tuple[Optional[str], str]:
+    """
+    (模型名, base_url)：供 logger.llm_call 打点用；同一个 llm 对象只读一次属性（pydantic 属性访问不便宜）。
+    """
+    k = id(llm)
+    hit = _IDENTITY_CACHE.get(k)
+    if hit is not None and hit[0] is llm:
+        return hit[1]
+    ident = (
+        getattr(llm, "model_name", None) or getattr(llm, "model", None),
+        str(getattr(llm, "base_url", "") or ""),
+    )
+    if len(_IDENTITY_CACHE) >= _IDENTITY_CACHE_MAX:
+        _IDENTITY_CACHE.clear()
+    _IDENTITY_CACHE[k] = (llm, ident)
+    return ident
@@ -5,6 +5,7 @@ import json
 import os
 import shutil
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import replace
 from datetime import datetime
 
@@ -71,6 +72,28 @@ from arc_summary import generate_arc_summary, write_arc_summary
 from materials import pick_outline_for_chapter, build_materials_bundle
 
 
+def _run_expert_agents(state: StoryState) -> StoryState:
+    """
+    阶段3：架构师/角色导演/编剧/基调 四个专家彼此独立（只读 planner_result/canon，各写各自的 *_result），
+    用线程并发执行，让各自的 LLM 等待时间重叠（总耗时≈最慢的专家，而不是四者之和）。
+    """
+    experts = (
+        ("architect", architect_agent),
+        ("character_director", character_director_agent),
+        ("screenwriter", screenwriter_agent),
+        ("tone", tone_agent),
+    )
+    with ThreadPoolExecutor(max_workers=len(experts)) as pool:
+        futures = [(name, pool.submit(fn, dict(state))) for name, fn in experts]
+        # 按固定顺序合并；任一专家抛错（如 force_llm 下解析失败）则原样上抛
+        for name, fut in futures:
+            out = fut.result()
+            for k in (f"{name}_result", f"{name}_used_llm"):
+                if k in out:
+                    state[k] = out[k]
+    return state
+
+
 def main():
     # Windows 控制台默认编码可能导致中文乱码；显式切换到 UTF-8
     if hasattr(sys.stdout, "reconfigure"):
@@ -723,6 +746,8 @@ def main():
             "editor_retry_on_invalid": int(meta.get("editor_retry_on_invalid", settings.editor_retry_on_invalid) or settings.editor_retry_on_invalid),
             "llm_max_attempts": int(meta.get("llm_max_attempts", settings.llm_max_attempts) or settings.llm_max_attempts),
             "llm_retry_base_sleep_s": float(meta.get("llm_retry_base_sleep_s", settings.llm_retry_base_sleep_s) or settings.llm_retry_base_sleep_s),
+            "editor_overlap_memory": bool(settings.editor_overlap_memory),
+            "editor_cache": bool(settings.editor_cache),
             "writer_min_ratio": float(meta.get("writer_min_ratio", getattr(settings, "writer_min_ratio", 0.75)) or getattr(settings, "writer_min_ratio", 0.75)),
             "writer_max_ratio": float(meta.get("writer_max_ratio", getattr(settings, "writer_max_ratio", 1.25)) or getattr(settings, "writer_max_ratio", 1.25)),
             "enable_arc_summary": bool(meta.get("enable_arc_summary", settings.enable_arc_summary)),
@@ -1482,6 +1507,10 @@ def main():
         "editor_retry_on_invalid": int(settings.editor_retry_on_invalid),
         "llm_max_attempts": int(settings.llm_max_attempts),
         "llm_retry_base_sleep_s": float(settings.llm_retry_base_sleep_s),
+        "canon_init_hedge": bool(settings.canon_init_hedge),
+        "canon_init_hedge_delay_s": float(settings.canon_init_hedge_delay_s),
+        "editor_overlap_memory": bool(settings.editor_overlap_memory),
+        "editor_cache": bool(settings.editor_cache),
         "enable_arc_summary": bool(settings.enable_arc_summary),
         "arc_every_n": int(settings.arc_every_n),
         "arc_recent_k": int(settings.arc_recent_k),
@@ -1536,7 +1565,7 @@ def main():
     planned_state["memory_recent_k"] = int(settings.memory_recent_k)
     planned_state = canon_init_agent(planned_state)
 
-    # 阶段3：多角色材料包（先串行，稳定后再升级为 LangGraph 并行分支）
+    # 阶段3：多角色材料包（四个专家并发执行，见 _run_expert_agents）
     # 先加载项目长期 materials（outline/tone），作为本次材料包的“基底”（计划类约束）
     try:
         long_materials = load_materials_bundle(project_dir)
@@ -1544,10 +1573,7 @@ def main():
         long_materials = {"outline": {}, "tone": {}}
     planned_state["long_materials"] = long_materials  # 仅用于调试/追溯（不强依赖）
 
-    planned_state = architect_agent(planned_state)
-    planned_state = character_director_agent(planned_state)
-    planned_state = screenwriter_agent(planned_state)
-    planned_state = tone_agent(planned_state)
+    planned_state = _run_expert_agents(planned_state)
     planned_state = materials_aggregator_agent(planned_state)
     planned_state = materials_pack_loop_agent(planned_state)
     # 将长期 materials 合并进 materials_bundle（不覆盖本次专家更具体的产出，只填空）
@@ -274,11 +274,29 @@ def pick_outline_for_chapter(bundle: Dict[str, Any], chapter_index: int) -> Dict
     return {}
 
 
+# 材料包摘要缓存：(id(bundle), chapter_index) -> (bundle, 摘要)。写手/主编每轮返工都会取同一章摘要；
+# 持有强引用并做 `is` 校验。材料包更新时上层会换成新 dict（不原地修改），因此按对象身份缓存即可。
+_DIGEST_CACHE: Dict[Tuple[int, Optional[int]], Tuple[Any, str]] = {}
+_DIGEST_CACHE_MAX = 8
+
+
 def materials_prompt_digest(bundle: Dict[str, Any], *, chapter_index: Optional[int] = None) -> str:
     """
     将材料包压缩成适合注入 prompt 的摘要（避免 prompt 膨胀）。
     - chapter_index 提供时，会额外抽取该章细纲。
     """
+    k = (id(bundle), chapter_index)
+    hit = _DIGEST_CACHE.get(k)
+    if hit is not None and hit[0] is bundle:
+        return hit[1]
+    out = _build_prompt_digest(bundle, chapter_index=chapter_index)
+    if len(_DIGEST_CACHE) >= _DIGEST_CACHE_MAX:
+        _DIGEST_CACHE.clear()
+    _DIGEST_CACHE[k] = (bundle, out)
+    return out
+
+
+def _build_prompt_digest(bundle: Dict[str, Any], *, chapter_index: Optional[int]) -> str:
     b = _as_dict(bundle)
     proj = _as_str(b.get("project_name", ""))
     idea = _as_str(b.get("idea", ""))
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Tuple
+
+from debug_log import truncate_text
+from json_utils import dumps_compact
+
+# planner_result 任务索引缓存：id -> (planner_result, {任务名称: 任务指令})。
+# 持有强引用并做 `is` 校验，避免对象释放后 id 被复用导致误命中。
+_TASK_INDEX_CACHE: Dict[int, Tuple[Any, Dict[str, str]]] = {}
+_TASK_INDEX_CACHE_MAX = 8
+# planner_result 文本缓存：id -> (planner_result, max_chars, 文本)；同样持有强引用并做 `is` 校验。
+_TEXT_CACHE: Dict[int, Tuple[Any, int, str]] = {}
+_TEXT_CACHE_MAX = 8
+
+
+def _build_task_index(planner_result: Any) -> Dict[str, str]:
+    tasks = planner_result.get("任务列表") if isinstance(planner_result, dict) else None
+    out: Dict[str, str] = {}
+    if not isinstance(tasks, list):
+        return out
+    for t in tasks:
+        if not isinstance(t, dict):
+            continue
+        name = str(t.get("任务名称", "") or "").strip()
+        # 与原线性扫描一致：同名任务以第一条为准
+        if name and name not in out:
+            out[name] = str(t.get("任务指令", "") or "").strip()
+    return out
+
+
+def planner_task_index(planner_result: Any) -> Dict[str, str]:
+    """
+    planner_result["任务列表"] -> {任务名称: 任务指令}。
+    同一个 planner_result 在多个节点（架构师/角色导演/编剧/基调）间复用，只建一次索引。
+    """
+    k = id(planner_result)
+    hit = _TASK_INDEX_CACHE.get(k)
+    if hit is not None and hit[0] is planner_result:
+        return hit[1]
+    idx = _build_task_index(planner_result)
+    if len(_TASK_INDEX_CACHE) >= _TASK_INDEX_CACHE_MAX:
+        _TASK_INDEX_CACHE.clear()
+    _TASK_INDEX_CACHE[k] = (planner_result, idx)
+    return idx
+
+
+def planner_task_instruction(planner_result: Any, name: str) -> str:
+    """
+    取策划任务书中某个任务的“任务指令”；不存在则返回空字符串。
+    """
+    return planner_task_index(planner_result).get(name, "")
+
+
+def planner_result_text(planner_result: Any, *, max_chars: int = 3000) -> str:
+    """
+    拼进 prompt 的策划结果文本：紧凑 JSON（不可序列化时退回 str），并截断到 max_chars，
+    避免整份任务书随项目变大无限撑长 prompt。
+    主编每轮审稿/返工都要用；同一个对象只序列化、截断一次。
+    """
+    k = id(planner_result)
+    hit = _TEXT_CACHE.get(k)
+    if hit is not None and hit[0] is planner_result and hit[1] == max_chars:
+        return hit[2]
+    if isinstance(planner_result, str):
+        text = planner_result
+    else:
+        try:
+            text = dumps_compact(planner_result)
+        except (TypeError, ValueError):
+            text = str(planner_result)
+    text = truncate_text(text, max_chars=int(max_chars))
+    if len(_TEXT_CACHE) >= _TEXT_CACHE_MAX:
+        _TEXT_CACHE.clear()
+    _TEXT_CACHE[k] = (planner_result, max_chars, text)
+    return text
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Tuple
+
+from debug_log import truncate_text
+from storage import (
+    build_canon_text_for_context,
+    build_recent_arc_synopsis,
+    build_recent_memory_synopsis,
+    infer_arc_start_from_materials_bundle,
+    infer_current_arc_start,
+    load_recent_arc_summaries,
+    load_recent_chapter_memories,
+)
+
+
+# Canon 与记忆/Arc 摘要的读盘互不依赖：Canon 放到后台线程与其余读取重叠。
+# 线程池模块级复用（首次用到时创建），避免每章起停线程。
+_IO_POOL: Optional[ThreadPoolExecutor] = None
+_IO_POOL_LOCK = threading.Lock()
+
+
+def _io_pool() -> ThreadPoolExecutor:
+    global _IO_POOL
+    if _IO_POOL is None:
+        with _IO_POOL_LOCK:
+            if _IO_POOL is None:
+                _IO_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="prompt-context")
+    return _IO_POOL
+
+
+def build_context_blocks(
+    project_dir: str,
+    *,
+    chapter_index: int,
+    k: int,
+    include_unapproved: bool,
+    arc_every_n: int,
+    arc_k: int,
+    enable_arc_summary: bool,
+    materials_bundle: Optional[Dict[str, Any]],
+) -> Tuple[str, str, str]:
+    """
+    写手/审稿注入的上下文块：(canon_text, memories_text, arc_text)。
+    """
+    arc_start = None
+    try:
+        if materials_bundle:
+            arc_start = infer_arc_start_from_materials_bundle(materials_bundle, chapter_index=chapter_index)
+    except Exception:
+        arc_start = None
+    canon_future = (
+        _io_pool().submit(
+            build_canon_text_for_context,
+            project_dir,
+            chapter_index=chapter_index,
+            arc_every_n=arc_every_n,
+            arc_recent_k=arc_k,
+            include_unapproved=include_unapproved,
+            materials_bundle=materials_bundle,
+            max_chars=6000,
+        )
+        if project_dir
+        else None
+    )
+    if not arc_start:
+        arc_start = infer_current_arc_start(project_dir, chapter_index=chapter_index, arc_every_n=arc_every_n) if project_dir else 1
+    recent_memories = (
+        load_recent_chapter_memories(
+            project_dir,
+            before_chapter=chapter_index,
+            k=k,
+            include_unapproved=include_unapproved,
+            min_chapter=arc_start,
+        )
+        if project_dir
+        else []
+    )
+    arc_text = ""
+    if enable_arc_summary and project_dir:
+        arcs = load_recent_arc_summaries(project_dir, before_chapter=chapter_index, k=arc_k)
+        arc_text = truncate_text(build_recent_arc_synopsis(arcs), max_chars=1400)
+    canon_text = canon_future.result() if canon_future is not None else "（无）"
+    memories_text = build_recent_memory_synopsis(recent_memories, max_chars=1200)
+    return canon_text, memories_text, arc_text
+
+
+# 上下文缓存：同一章写作、返工、重审时 Canon/记忆/Arc 摘要通常不变，不必每轮重新读盘、归一化、序列化。
+# 键含全部入参与 materials_bundle 的 id（值里持有强引用并做 `is` 校验）；
+# 值里再存 canon/ 与 memory/ 下文件的 (名称, mtime_ns, size) 签名，任何文件变化都会让缓存失效。
+_CONTEXT_CACHE: Dict[Tuple[Any, ...], Tuple[Any, Tuple[Any, ...], Tuple[str, str, str]]] = {}
+_CONTEXT_CACHE_MAX = 8
+
+
+def _dir_signature(path: str) -> Tuple[Any, ...]:
+    try:
+        with os.scandir(path) as it:
+            return tuple(sorted((e.name, st.st_mtime_ns, st.st_size) for e in it for st in (e.stat(),)))
+    except OSError:
+        return ()
+
+
+def context_signature(project_dir: str) -> Tuple[Any, ...]:
+    """
+    canon / 章节记忆 / arc 目录的 (文件名, mtime, size) 签名；任一文件变化签名即变。
+    """
+    return (
+        _dir_signature(os.path.join(project_dir, "canon")),
+        _dir_signature(os.path.join(project_dir, "memory", "chapters")),
+        _dir_signature(os.path.join(project_dir, "memory", "arcs")),
+    )
+
+
+def context_blocks(project_dir: str, *, materials_bundle: Optional[Dict[str, Any]], **params: Any) -> Tuple[str, str, str]:
+    """
+    带缓存的 build_context_blocks：写手与主编同参数调用时共享结果，canon/记忆目录有任何文件变化即重建。
+    """
+    if not project_dir:
+        return build_context_blocks(project_dir, materials_bundle=materials_bundle, **params)
+    key = (project_dir, id(materials_bundle), tuple(sorted(params.items())))
+    sig = context_signature(project_dir)
+    hit = _CONTEXT_CACHE.get(key)
+    if hit is not None and hit[0] is materials_bundle and hit[1] == sig:
+        return hit[2]
+    blocks = build_context_blocks(project_dir, materials_bundle=materials_bundle, **params)
+    if len(_CONTEXT_CACHE) >= _CONTEXT_CACHE_MAX:
+        _CONTEXT_CACHE.clear()
+    _CONTEXT_CACHE[key] = (materials_bundle, sig, blocks)
+    return blocks
@@ -37,6 +37,14 @@ class AppSettings:
     # LLM 调用重试（抗网络/限流抖动）
     llm_max_attempts: int = 3
     llm_retry_base_sleep_s: float = 1.0
+    # canon_init 对冲请求：主调用迟迟未返回时提前并发发出“更短更保守”的重试（多花一次调用，换失败时的延迟）
+    canon_init_hedge: bool = False
+    # 对冲触发延迟（秒）：主调用超过该时长仍未返回才发出对冲请求；应接近 canon_init 的正常耗时，过小则几乎每次都会对冲
+    canon_init_hedge_delay_s: float = 30.0
+    # 章节子工作流：最后一轮主编审核时，并发提前抽取本章记忆（只依赖正文；会与主编调用同时占用一路并发）
+    editor_overlap_memory: bool = False
+    # 主编结果缓存：相同 prompt 复用上次已通过校验的审稿报告（开发/回放时省掉重复调用）
+    editor_cache: bool = False
 
     # writer 字数阈值（用于自动续写/缩稿的触发区间；放宽可减少“扩容/缩容”频繁触发）
     # - writer_min_ratio: 低于 target_words * ratio 才触发 writer_continue（除非 finish_reason=length）
@@ -172,6 +180,15 @@ def load_settings(
         cfg_llm_retry_base_sleep_s = float(cfg_app.get("llm_retry_base_sleep_s", AppSettings.llm_retry_base_sleep_s))
     except ValueError:
         cfg_llm_retry_base_sleep_s = AppSettings.llm_retry_base_sleep_s
+    cfg_canon_init_hedge = bool(cfg_app.get("canon_init_hedge", AppSettings.canon_init_hedge))
+    try:
+        cfg_canon_init_hedge_delay_s = float(
+            cfg_app.get("canon_init_hedge_delay_s", AppSettings.canon_init_hedge_delay_s)
+        )
+    except ValueError:
+        cfg_canon_init_hedge_delay_s = AppSettings.canon_init_hedge_delay_s
+    cfg_editor_overlap_memory = bool(cfg_app.get("editor_overlap_memory", AppSettings.editor_overlap_memory))
+    cfg_editor_cache = bool(cfg_app.get("editor_cache", AppSettings.editor_cache))
     cfg_enable_arc_summary = bool(cfg_app.get("enable_arc_summary", AppSettings.enable_arc_summary))
     cfg_arc_every_n = int(cfg_app.get("arc_every_n", AppSettings.arc_every_n))
     cfg_arc_recent_k = int(cfg_app.get("arc_recent_k", AppSettings.arc_recent_k))
@@ -231,6 +248,10 @@ def load_settings(
     env_writer_max_ratio = (os.getenv("WRITER_MAX_RATIO", "") or "").strip()
     env_materials_pack_max_rounds = (os.getenv("MATERIALS_PACK_MAX_ROUNDS", "") or "").strip()
     env_materials_pack_min_decisions = (os.getenv("MATERIALS_PACK_MIN_DECISIONS", "") or "").strip()
+    env_canon_init_hedge = (os.getenv("CANON_INIT_HEDGE", "") or "").strip().lower()
+    env_canon_init_hedge_delay_s = (os.getenv("CANON_INIT_HEDGE_DELAY_S", "") or "").strip()
+    env_editor_overlap_memory = (os.getenv("EDITOR_OVERLAP_MEMORY", "") or "").strip().lower()
+    env_editor_cache = (os.getenv("EDITOR_CACHE", "") or "").strip().lower()
     env_enable_arc_summary = (os.getenv("ENABLE_ARC_SUMMARY", "") or "").strip().lower()
     env_arc_every_n = (os.getenv("ARC_EVERY_N", "") or "").strip()
     env_arc_recent_k = (os.getenv("ARC_RECENT_K", "") or "").strip()
@@ -266,6 +287,10 @@ def load_settings(
     final_writer_max_ratio = cfg_writer_max_ratio
     final_materials_pack_max_rounds = cfg_materials_pack_max_rounds
     final_materials_pack_min_decisions = cfg_materials_pack_min_decisions
+    final_canon_init_hedge = cfg_canon_init_hedge
+    final_canon_init_hedge_delay_s = cfg_canon_init_hedge_delay_s
+    final_editor_overlap_memory = cfg_editor_overlap_memory
+    final_editor_cache = cfg_editor_cache
     final_enable_arc_summary = cfg_enable_arc_summary
     final_arc_every_n = cfg_arc_every_n
     final_arc_recent_k = cfg_arc_recent_k
@@ -331,6 +356,23 @@ def load_settings(
         except ValueError:
             final_materials_pack_min_decisions = cfg_materials_pack_min_decisions
 
+    if env_canon_init_hedge in ("1", "true", "yes", "on"):
+        final_canon_init_hedge = True
+    if env_canon_init_hedge in ("0", "false", "no", "off"):
+        final_canon_init_hedge = False
+    if env_canon_init_hedge_delay_s:
+        try:
+            final_canon_init_hedge_delay_s = float(env_canon_init_hedge_delay_s)
+        except ValueError:
+            final_canon_init_hedge_delay_s = cfg_canon_init_hedge_delay_s
+    if env_editor_overlap_memory in ("1", "true", "yes", "on"):
+        final_editor_overlap_memory = True
+    if env_editor_overlap_memory in ("0", "false", "no", "off"):
+        final_editor_overlap_memory = False
+    if env_editor_cache in ("1", "true", "yes", "on"):
+        final_editor_cache = True
+    if env_editor_cache in ("0", "false", "no", "off"):
+        final_editor_cache = False
     if env_enable_arc_summary in ("1", "true", "yes", "on"):
         final_enable_arc_summary = True
     if env_enable_arc_summary in ("0", "false", "no", "off"):
@@ -439,6 +481,7 @@ def load_settings(
     final_editor_retry_on_invalid = max(0, min(3, int(final_editor_retry_on_invalid)))
     final_llm_max_attempts = max(1, min(6, int(final_llm_max_attempts)))
     final_llm_retry_base_sleep_s = max(0.2, min(10.0, float(final_llm_retry_base_sleep_s)))
+    final_canon_init_hedge_delay_s = max(1.0, min(600.0, float(final_canon_init_hedge_delay_s)))
     final_writer_min_ratio = max(0.3, min(0.95, float(final_writer_min_ratio)))
     final_writer_max_ratio = max(1.05, min(2.0, float(final_writer_max_ratio)))
     final_materials_pack_max_rounds = max(0, min(6, int(final_materials_pack_max_rounds)))
@@ -492,6 +535,10 @@ def load_settings(
         editor_retry_on_invalid=final_editor_retry_on_invalid,
         llm_max_attempts=final_llm_max_attempts,
         llm_retry_base_sleep_s=final_llm_retry_base_sleep_s,
+        canon_init_hedge=final_canon_init_hedge,
+        canon_init_hedge_delay_s=final_canon_init_hedge_delay_s,
+        editor_overlap_memory=final_editor_overlap_memory,
+        editor_cache=final_editor_cache,
         writer_min_ratio=final_writer_min_ratio,
         writer_max_ratio=final_writer_max_ratio,
         materials_pack_max_rounds=final_materials_pack_max_rounds,
@@ -69,6 +69,10 @@ class StoryState(TypedDict, total=False):
 
     # Canon 初始化（阶段2.2）
     canon_init_used_llm: bool
+    # canon_init 对冲请求（主调用慢时提前并发发出保守重试）
+    canon_init_hedge: bool
+    # 对冲触发延迟（秒）
+    canon_init_hedge_delay_s: float
     # Canon 增量更新（阶段2：从 chapter memory 沉淀回 canon）
     canon_update_used: bool
     # Canon 增量更新建议（从 chapter memory 提炼出的可应用补丁；默认只落盘，需用户确认后再 apply）
@@ -91,10 +95,18 @@ class StoryState(TypedDict, total=False):
     canon_suggestions: List[Dict[str, Any]]
     needs_rewrite: bool
     editor_used_llm: bool
+    # 主编结果缓存：相同 prompt 复用上次已通过校验的审稿报告
+    editor_cache: bool
+    # 单次跳过缓存读取（仍写入）：需要对同一 prompt 重新审稿时由上层临时置 True
+    editor_cache_bypass: bool
+    # 上次送审输入指纹（正文+参数+Canon/记忆签名）；editor_cache 开启时相同指纹的重跑直接沿用上次结论
+    editor_input_key: str
 
     # 章节记忆（审核通过后生成，用于长期一致性）
     chapter_memory: Dict[str, Any]
     memory_used_llm: bool
+    # 是否在最后一轮主编审核时并发提前抽取本章记忆
+    editor_overlap_memory: bool
 
     # === 阶段3：多角色并行材料（run级别产出，供后续章节写作/审核注入） ===
     architect_result: Dict[str, Any]         # 世界观/规则/势力/地点（结构化）
@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import os
+import pickle
 import re
 import shutil
 from datetime import datetime
 from typing import Any, Dict, Optional, List, Tuple
 
 from debug_log import truncate_text
+from json_utils import budget_json, dumps_compact, loads_json
 
 def safe_filename(name: str, fallback: str = "project") -> str:
     name = (name or "").strip() or fallback
@@ -32,6 +35,48 @@ def write_json(path: str, data: Dict[str, Any]) -> None:
         json.dump(data, f, ensure_ascii=False, indent=2)
 
 
+def write_json_batch(items: List[Tuple[str, Dict[str, Any]]]) -> None:
+    """
+    批量写入一组需要“一起落盘”的 JSON（如 canon 的 world/characters/timeline）：
+    - 先全部序列化：任一失败则一个文件都不动
+    - 再逐个写临时文件，最后统一 os.replace 原子替换，避免中途失败留下半套新旧混合的文件
+    """
+    _replace_all([(path, json.dumps(data, ensure_ascii=False, indent=2)) for path, data in items])
+
+
+def write_canon_bundle(canon_dir: str, changes: Dict[str, Any]) -> None:
+    """
+    一次性落盘 canon 目录下有改动的文件：{文件名: 内容}。
+    - dict -> JSON（world/characters/timeline）；str -> 原样文本（style.md）
+    - 与 write_json_batch 相同的“全部序列化 -> 临时文件 -> 统一替换”流程
+    """
+    payloads: List[Tuple[str, str]] = []
+    for name, data in changes.items():
+        text = data if isinstance(data, str) else json.dumps(data, ensure_ascii=False, indent=2)
+        payloads.append((os.path.join(canon_dir, name), text))
+    _replace_all(payloads)
+
+
+def _replace_all(payloads: List[Tuple[str, str]]) -> None:
+    tmps: List[Tuple[str, str]] = []
+    try:
+        for path, text in payloads:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp = path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(text)
+            tmps.append((tmp, path))
+        for tmp, path in tmps:
+            os.replace(tmp, path)
+    finally:
+        for tmp, _path in tmps:
+            if os.path.exists(tmp):
+                try:
+                    os.remove(tmp)
+                except Exception:
+                    pass
+
+
 def read_json(path: str) -> Optional[Dict[str, Any]]:
     """
     读取 JSON（不存在/解析失败返回 None）
@@ -53,8 +98,8 @@ def _read_json_if_exists(path: str) -> Optional[Dict[str, Any]]:
     if not path or not os.path.exists(path):
         return None
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            obj = json.load(f)
+        with open(path, "rb") as f:
+            obj = loads_json(f.read())
         return obj if isinstance(obj, dict) else None
     except Exception:
         return None
@@ -168,16 +213,34 @@ def load_materials_bundle(project_dir: str) -> Dict[str, Any]:
     }
 
 
+_CANON_FILES = frozenset({"world.json", "characters.json", "timeline.json", "style.md"})
+
+
 def load_canon_bundle(project_dir: str) -> Dict[str, Any]:
     """
     读取 Canon 四件套（world/characters/timeline/style），用于写作/审核注入。
     """
     canon_dir = os.path.join(project_dir, "canon")
+    # 一次 scandir 拿到“哪些文件存在 + 大小”：缺失/空文件（含只有 "{}" 的占位）直接跳过，不逐个 exists/open
+    sizes: Dict[str, int] = {}
+    try:
+        with os.scandir(canon_dir) as it:
+            for e in it:
+                if e.name in _CANON_FILES and e.is_file():
+                    sizes[e.name] = e.stat().st_size
+    except OSError:
+        pass
+
+    def _json(name: str) -> Dict[str, Any]:
+        if sizes.get(name, 0) <= 2:
+            return {}
+        return _read_json_if_exists(os.path.join(canon_dir, name)) or {}
+
     return {
-        "world": read_json(os.path.join(canon_dir, "world.json")) or {},
-        "characters": read_json(os.path.join(canon_dir, "characters.json")) or {},
-        "timeline": read_json(os.path.join(canon_dir, "timeline.json")) or {},
-        "style": read_text_if_exists(os.path.join(canon_dir, "style.md")),
+        "world": _json("world.json"),
+        "characters": _json("characters.json"),
+        "timeline": _json("timeline.json"),
+        "style": read_text_if_exists(os.path.join(canon_dir, "style.md")) if sizes.get("style.md") else "",
     }
 
 
@@ -453,6 +516,11 @@ def build_active_character_set(
     return out
 
 
+# Canon 注入文本缓存：(project_dir, max_chars) -> (内容摘要, 文本)。满了直接清空。
+_CANON_ETAG_TEXT: Dict[Tuple[str, int], Tuple[bytes, str]] = {}
+_CANON_ETAG_TEXT_MAX = 8
+
+
 def build_canon_text_for_context(
     project_dir: str,
     *,
@@ -492,18 +560,28 @@ def build_canon_text_for_context(
             if (i == 0) or (name and name in active):
                 keep.append(it)
         canon["characters"] = {"characters": keep}
-    return truncate_text(
-        json.dumps(
-            {
-                "world": canon.get("world", {}) or {},
-                "characters": canon.get("characters", {}) or {},
-                "timeline": canon.get("timeline", {}) or {},
-            },
-            ensure_ascii=False,
-            indent=2,
-        ),
-        max_chars=int(max_chars),
-    )
+    subset = {
+        "world": canon.get("world", {}) or {},
+        "characters": canon.get("characters", {}) or {},
+        "timeline": canon.get("timeline", {}) or {},
+    }
+    # ETag：内容摘要未变（返工循环里 canon 通常不动）就直接复用上次的文本，跳过缩进序列化+截断
+    key = (project_dir, int(max_chars))
+    try:
+        etag = hashlib.blake2b(pickle.dumps(subset, protocol=pickle.HIGHEST_PROTOCOL), digest_size=16).digest()
+    except Exception:
+        etag = None
+    hit = _CANON_ETAG_TEXT.get(key)
+    if etag is not None and hit is not None and hit[0] == etag:
+        return hit[1]
+    # 紧凑 JSON + 字符预算：缩进空白不占预算；超长时编码到预算即停，并在完整子结构处闭合（仍是合法 JSON）。
+    # 预算内闭合不了任何子结构（如首条设定本身就超长）时退回首尾截断，不能让 Canon 段落整段为空
+    text = budget_json(subset, int(max_chars)) or truncate_text(dumps_compact(subset), max_chars=int(max_chars))
+    if etag is not None:
+        if len(_CANON_ETAG_TEXT) >= _CANON_ETAG_TEXT_MAX:
+            _CANON_ETAG_TEXT.clear()
+        _CANON_ETAG_TEXT[key] = (etag, text)
+    return text
 
 
 def infer_arc_start_from_materials_bundle(materials_bundle: Dict[str, Any], *, chapter_index: int) -> Optional[int]:
@@ -546,9 +624,11 @@ def infer_arc_start_from_materials_bundle(materials_bundle: Dict[str, Any], *, c
         return None
 
 
-def build_recent_memory_synopsis(memories: List[Dict[str, Any]]) -> str:
+def build_recent_memory_synopsis(memories: List[Dict[str, Any]], *, max_chars: int = 0) -> str:
     """
     将最近章节记忆压缩成“梗概串”，避免把完整 memory JSON 塞进 prompt。
+    - max_chars>0：先整体拼好，超出预算才从最旧的一章开始整条丢弃，直到放得下
+      （逐行长度只算一次；常见情况不超预算，不做任何额外处理）；只剩一章仍超长时再截断。
     """
     if not memories:
         return "（无）"
@@ -563,6 +643,15 @@ def build_recent_memory_synopsis(memories: List[Dict[str, Any]]) -> str:
         if len(summary) > 280:
             summary = summary[:260].rstrip() + "…"
         lines.append(f"- 第{chap}章：{summary}")
+    if max_chars > 0 and lines:
+        lens = [len(x) for x in lines]
+        total = sum(lens) + len(lines) - 1
+        drop = 0
+        while total > max_chars and drop < len(lines) - 1:
+            total -= lens[drop] + 1
+            drop += 1
+        text = "\n".join(lines[drop:]).strip()
+        return truncate_text(text, max_chars=max_chars) if len(text) > max_chars else (text or "（无）")
     return "\n".join(lines).strip() or "（无）"
 
 
@@ -620,6 +709,9 @@ def build_recent_arc_synopsis(arcs: List[Dict[str, Any]]) -> str:
     return "\n".join(lines).strip() or "（无）"
 
 
+_MEMORY_FILE_RE = re.compile(r"^(\d+)\.memory\.json$")
+
+
 def get_max_chapter_memory_index(project_dir: str) -> int:
     """
     从 projects/<project>/memory/chapters/*.memory.json 推断已有最大章号。
@@ -628,24 +720,13 @@ def get_max_chapter_memory_index(project_dir: str) -> int:
     mem_dir = os.path.join(project_dir, "memory", "chapters")
     if not os.path.exists(mem_dir):
         return 0
-    max_idx = 0
     try:
-        for name in os.listdir(mem_dir):
-            if not name.endswith(".memory.json"):
-                continue
-            # 支持 001.memory.json / 101.memory.json
-            m = re.match(r"^(\d+)\.memory\.json$", name)
-            if not m:
-                continue
-            try:
-                idx = int(m.group(1))
-            except ValueError:
-                continue
-            if idx > max_idx:
-                max_idx = idx
+        names = os.listdir(mem_dir)
     except Exception:
         return 0
-    return max_idx
+    # 支持 001.memory.json / 101.memory.json；正则已保证是数字，int() 不会失败，循环内无需 try
+    matches = (_MEMORY_FILE_RE.match(name) for name in names if name.endswith(".memory.json"))
+    return max((int(m.group(1)) for m in matches if m), default=0)
 
 
 def archive_run(
@@ -1025,6 +1106,30 @@ def preview_canon_suggestions(items: List[Dict[str, Any]]) -> str:
     return "\n".join(lines).rstrip()
 
 
+class _NoteBuffer:
+    """
+    notes 文本的追加缓冲：已有行建一次集合，之后每条 add 都是 O(1) 去重。
+    """
+
+    def __init__(self, text: str) -> None:
+        self.head = text.rstrip()
+        self.seen = {ln.strip() for ln in self.head.splitlines() if ln.strip()}
+        self.lines: List[str] = []
+        self.changed = False
+
+    def add(self, line: str) -> bool:
+        if not line or line in self.seen:
+            return False
+        self.seen.add(line)
+        self.lines.append(line)
+        self.changed = True
+        return True
+
+    def text(self) -> str:
+        parts = [self.head] if self.head.strip() else []
+        return "\n".join(parts + self.lines).strip()
+
+
 def apply_canon_suggestions(
     *,
     project_dir: str,
@@ -1042,13 +1147,58 @@ def apply_canon_suggestions(
     返回：统计信息与备份路径列表。
     """
     canon_dir = os.path.join(project_dir, "canon")
-    world_path = os.path.join(canon_dir, "world.json")
-    characters_path = os.path.join(canon_dir, "characters.json")
-    timeline_path = os.path.join(canon_dir, "timeline.json")
-    style_path = os.path.join(canon_dir, "style.md")
 
     stats = {"applied": 0, "skipped": 0, "backups": []}  # type: ignore[dict-item]
 
+    # 每个 canon 文件只读一次、只备份一次（备份的是应用前的原始内容），
+    # 所有条目在内存里依次应用，最后对有改动的文件统一落盘一次
+    docs: Dict[str, Any] = {}
+    dirty: List[str] = []
+    # notes / style.md 追加：每个文件一个行缓冲（集合去重），最后统一拼回，避免每条都重扫/重拼整段文本
+    notes: Dict[str, _NoteBuffer] = {}
+    # _upsert_by_key 的同名索引：(id(数组), key_fields) -> {键值: 下标}；数组随 docs 存活，id 不会复用
+    key_indexes: Dict[Tuple[int, Tuple[str, ...]], Dict[Tuple[Any, ...], int]] = {}
+
+    def _append(arr: List[Any], item: Any) -> None:
+        # 同一数组可能按多组 key_fields 建过索引（如 timeline 的 (chapter,event) 与 (name,)）：
+        # 追加后逐个补登新下标，保证任一索引都能看到经其它路径追加的条目
+        arr.append(item)
+        if not isinstance(item, dict):
+            return
+        pos = len(arr) - 1
+        for (aid, fields), index in key_indexes.items():
+            if aid != id(arr):
+                continue
+            try:
+                index.setdefault(tuple(item.get(k) for k in fields), pos)
+            except TypeError:
+                continue
+
+    def _replace(arr: List[Any], pos: int, merged: Any) -> None:
+        # 合并可能改动其它索引的键字段（如按 (chapter,event) 命中后补上/改了 name）：
+        # 键值变了的索引整张作废，下次用到时按当前数组重建，保持与线性扫描“取第一条匹配”一致
+        old = arr[pos]
+        arr[pos] = merged
+        for idx_key in [k for k in key_indexes if k[0] == id(arr)]:
+            fields = idx_key[1]
+            if not (isinstance(old, dict) and isinstance(merged, dict)) or any(
+                old.get(k) != merged.get(k) for k in fields
+            ):
+                del key_indexes[idx_key]
+
+    def _load(target: str) -> Any:
+        if target not in docs:
+            path = os.path.join(canon_dir, target)
+            docs[target] = read_text_if_exists(path) if target == "style.md" else (read_json(path) or {})
+            bak = _backup_file(path)
+            if bak:
+                stats["backups"].append(bak)
+        return docs[target]
+
+    def _mark_dirty(target: str) -> None:
+        if target not in dirty:
+            dirty.append(target)
+
     def _is_empty(v: Any) -> bool:
         if v is None:
             return True
@@ -1094,22 +1244,33 @@ def apply_canon_suggestions(
         for k in key_fields:
             if k not in item or _is_empty(item.get(k)):
                 return False
-        # 查找匹配项
-        for i, cur in enumerate(arr):
-            if not isinstance(cur, dict):
-                continue
-            ok = True
-            for k in key_fields:
-                if cur.get(k) != item.get(k):
-                    ok = False
-                    break
-            if not ok:
-                continue
-            # 合并更新
-            arr[i] = _deep_merge_keep_old_on_empty(cur, item)
+        # 查找匹配项：每个数组按 key_fields 建一次 {键值: 下标} 索引，后续条目 O(1) 命中
+        ident = tuple(item.get(k) for k in key_fields)
+        idx_key = (id(arr), key_fields)
+        index = key_indexes.get(idx_key)
+        if index is None:
+            index = {}
+            for i, cur in enumerate(arr):
+                if isinstance(cur, dict):
+                    try:
+                        index.setdefault(tuple(cur.get(k) for k in key_fields), i)
+                    except TypeError:
+                        continue
+            key_indexes[idx_key] = index
+        try:
+            hit = index.get(ident)
+        except TypeError:
+            # 键值不可哈希（list/dict）：退回线性扫描
+            hit = next(
+                (i for i, cur in enumerate(arr) if isinstance(cur, dict) and all(cur.get(k) == item.get(k) for k in key_fields)),
+                None,
+            )
+        if hit is not None:
+            # 合并更新（同步该数组的其它索引）
+            _replace(arr, hit, _deep_merge_keep_old_on_empty(arr[hit], item))
             return True
-        # 不存在则追加
-        arr.append(item)
+        # 不存在则追加（同时登记到该数组的所有索引）
+        _append(arr, item)
         return True
 
     def _print_help() -> None:
@@ -1126,161 +1287,152 @@ def apply_canon_suggestions(
     apply_all_remaining = bool(yes)
     quit_all = False
 
-    for idx, it in enumerate(items, start=1):
-        if quit_all:
-            stats["skipped"] += 1
-            continue
-        # 防御：只允许应用 canon_patch（若 action 存在且不是 canon_patch，则跳过）
-        act = str(it.get("action", "") or "").strip()
-        if act and act != "canon_patch":
-            stats["skipped"] += 1
-            continue
-        cp = it.get("canon_patch") if isinstance(it.get("canon_patch"), dict) else {}
-        target = str(cp.get("target", "") or "").strip()
-        op = str(cp.get("op", "") or "").strip()
-        path = str(cp.get("path", "") or "").strip()
-        value = cp.get("value", None)
-
-        if not target or target == "N/A":
-            stats["skipped"] += 1
-            continue
-
-        # 每条建议逐条确认（更人性化：支持 a/y/s/p/q/?）
-        action = "apply" if apply_all_remaining else "ask"
-        if action == "ask":
-            while True:
-                print(f"\n[{idx}/{len(items)}] target={target} op={op} path={path}")
-                ans = input("选择：y(应用) s(跳过) a(全部应用) p(详情) q(退出) ?(帮助) > ").strip().lower()
-                if ans in ("?", "h", "help"):
-                    _print_help()
-                    continue
-                if ans in ("p", "print"):
-                    try:
-                        print(json.dumps(it, ensure_ascii=False, indent=2))
-                    except Exception:
-                        print(str(it))
-                    continue
-                if ans in ("a", "all"):
-                    apply_all_remaining = True
-                    action = "apply"
-                    break
-                if ans in ("q", "quit", "exit"):
-                    quit_all = True
-                    action = "skip"
-                    break
-                if ans in ("s", "skip", "n", "no", ""):
-                    action = "skip"
-                    break
-                if ans in ("y", "yes", "是", "确认"):
-                    action = "apply"
-                    break
-                print("未识别指令，输入 ? 查看帮助。")
-
-        if quit_all:
-            stats["skipped"] += 1
-            continue
-        if action == "skip":
-            stats["skipped"] += 1
-            continue
-
-        if dry_run:
-            stats["applied"] += 1
-            continue
-
-        if target == "style.md":
-            bak = _backup_file(style_path)
-            if bak:
-                stats["backups"].append(bak)
-            old = read_text_if_exists(style_path)
-            line = str(value if value is not None else "").strip()
-            if not line:
+    # 中途退出（q 之外的 Ctrl-C / EOF / 异常）时也把已确认的条目落盘，与逐条即写时的行为一致
+    try:
+        for idx, it in enumerate(items, start=1):
+            if quit_all:
                 stats["skipped"] += 1
                 continue
-            bullet = line if line.startswith("- ") else f"- {line}"
-            new = (old.rstrip() + "\n" + bullet + "\n").lstrip("\n")
-            write_text(style_path, new)
-            stats["applied"] += 1
-            continue
-
-        # JSON targets
-        if target == "world.json":
-            obj = read_json(world_path) or {}
-            bak = _backup_file(world_path)
-            if bak:
-                stats["backups"].append(bak)
-        elif target == "characters.json":
-            obj = read_json(characters_path) or {}
-            bak = _backup_file(characters_path)
-            if bak:
-                stats["backups"].append(bak)
-        elif target == "timeline.json":
-            obj = read_json(timeline_path) or {}
-            bak = _backup_file(timeline_path)
-            if bak:
-                stats["backups"].append(bak)
-        else:
-            stats["skipped"] += 1
-            continue
+            # 防御：只允许应用 canon_patch（若 action 存在且不是 canon_patch，则跳过）
+            act = str(it.get("action", "") or "").strip()
+            if act and act != "canon_patch":
+                stats["skipped"] += 1
+                continue
+            cp = it.get("canon_patch") if isinstance(it.get("canon_patch"), dict) else {}
+            target = str(cp.get("target", "") or "").strip()
+            op = str(cp.get("op", "") or "").strip()
+            path = str(cp.get("path", "") or "").strip()
+            value = cp.get("value", None)
 
-        if op == "note":
-            # path 为空则默认写到 notes
-            key = path or "notes"
-            if key != "notes":
-                # 目前只支持 notes，避免复杂 path 修改
+            if not target or target == "N/A":
                 stats["skipped"] += 1
                 continue
-            prev = str(obj.get("notes", "") or "")
-            line = str(value if value is not None else "").strip()
-            if not line:
+
+            # 每条建议逐条确认（更人性化：支持 a/y/s/p/q/?）
+            action = "apply" if apply_all_remaining else "ask"
+            if action == "ask":
+                while True:
+                    print(f"\n[{idx}/{len(items)}] target={target} op={op} path={path}")
+                    ans = input("选择：y(应用) s(跳过) a(全部应用) p(详情) q(退出) ?(帮助) > ").strip().lower()
+                    if ans in ("?", "h", "help"):
+                        _print_help()
+                        continue
+                    if ans in ("p", "print"):
+                        try:
+                            print(json.dumps(it, ensure_ascii=False, indent=2))
+                        except Exception:
+                            print(str(it))
+                        continue
+                    if ans in ("a", "all"):
+                        apply_all_remaining = True
+                        action = "apply"
+                        break
+                    if ans in ("q", "quit", "exit"):
+                        quit_all = True
+                        action = "skip"
+                        break
+                    if ans in ("s", "skip", "n", "no", ""):
+                        action = "skip"
+                        break
+                    if ans in ("y", "yes", "是", "确认"):
+                        action = "apply"
+                        break
+                    print("未识别指令，输入 ? 查看帮助。")
+
+            if quit_all:
                 stats["skipped"] += 1
                 continue
-            if line not in prev:
-                obj["notes"] = (prev.rstrip() + ("\n" if prev.strip() else "") + line).strip()
-            # 写回
-        elif op == "append":
-            # append 到数组字段（如 rules/factions/places/events/characters）
-            arr = _deep_get(obj, path)
-            if not isinstance(arr, list):
+            if action == "skip":
                 stats["skipped"] += 1
                 continue
-            # value 可能本身就是 list（例如 editor 一次性给出多条 rules/events/characters）。
-            # 这里做“幂等 + 可增量更新（upsert）”：
-            # - 对 dict 且包含关键字段（如 name / chapter+event），视为同一实体的补全更新
-            # - 否则按深度相等去重追加
-            items_to_apply = value if isinstance(value, list) else [value]
-            for v in items_to_apply:
-                if v is None:
+
+            if dry_run:
+                stats["applied"] += 1
+                continue
+
+            if target == "style.md":
+                old = _load(target)
+                line = str(value if value is not None else "").strip()
+                if not line:
+                    stats["skipped"] += 1
                     continue
-                # characters.json: characters 按 name upsert
-                if target == "characters.json" and path == "characters":
-                    if _upsert_by_key(arr, v, key_fields=("name",)):
-                        continue
-                # world.json: rules/factions/places 按 name upsert
-                if target == "world.json" and path in ("rules", "factions", "places"):
-                    if _upsert_by_key(arr, v, key_fields=("name",)):
-                        continue
-                # timeline.json: events 按 (chapter,event) upsert；否则退化为 name
-                if target == "timeline.json" and path == "events":
-                    if _upsert_by_key(arr, v, key_fields=("chapter", "event")):
-                        continue
-                    if _upsert_by_key(arr, v, key_fields=("name",)):
-                        continue
+                bullet = line if line.startswith("- ") else f"- {line}"
+                # 已有同一条 bullet 则不重复追加（与 notes 一致：幂等）
+                if target not in notes:
+                    notes[target] = _NoteBuffer(old)
+                notes[target].add(bullet)
+                _mark_dirty(target)
+                stats["applied"] += 1
+                continue
 
-                # fallback：幂等追加
-                if v not in arr:
-                    arr.append(v)
-        else:
-            stats["skipped"] += 1
-            continue
+            # JSON targets
+            if target not in ("world.json", "characters.json", "timeline.json"):
+                stats["skipped"] += 1
+                continue
+            obj = _load(target)
 
-        if target == "world.json":
-            write_json(world_path, obj)
-        elif target == "characters.json":
-            write_json(characters_path, obj)
-        else:
-            write_json(timeline_path, obj)
-        stats["applied"] += 1
+            if op == "note":
+                # path 为空则默认写到 notes
+                key = path or "notes"
+                if key != "notes":
+                    # 目前只支持 notes，避免复杂 path 修改
+                    stats["skipped"] += 1
+                    continue
+                line = str(value if value is not None else "").strip()
+                if not line:
+                    stats["skipped"] += 1
+                    continue
+                if target not in notes:
+                    notes[target] = _NoteBuffer(str(obj.get("notes", "") or ""))
+                notes[target].add(line)
+            elif op == "append":
+                # append 到数组字段（如 rules/factions/places/events/characters）
+                arr = _deep_get(obj, path)
+                if not isinstance(arr, list):
+                    stats["skipped"] += 1
+                    continue
+                # value 可能本身就是 list（例如 editor 一次性给出多条 rules/events/characters）。
+                # 这里做“幂等 + 可增量更新（upsert）”：
+                # - 对 dict 且包含关键字段（如 name / chapter+event），视为同一实体的补全更新
+                # - 否则按深度相等去重追加
+                items_to_apply = value if isinstance(value, list) else [value]
+                for v in items_to_apply:
+                    if v is None:
+                        continue
+                    # characters.json: characters 按 name upsert
+                    if target == "characters.json" and path == "characters":
+                        if _upsert_by_key(arr, v, key_fields=("name",)):
+                            continue
+                    # world.json: rules/factions/places 按 name upsert
+                    if target == "world.json" and path in ("rules", "factions", "places"):
+                        if _upsert_by_key(arr, v, key_fields=("name",)):
+                            continue
+                    # timeline.json: events 按 (chapter,event) upsert；否则退化为 name
+                    if target == "timeline.json" and path == "events":
+                        if _upsert_by_key(arr, v, key_fields=("chapter", "event")):
+                            continue
+                        if _upsert_by_key(arr, v, key_fields=("name",)):
+                            continue
+
+                    # fallback：幂等追加
+                    if v not in arr:
+                        _append(arr, v)
+            else:
+                stats["skipped"] += 1
+                continue
 
+            _mark_dirty(target)
+            stats["applied"] += 1
+    finally:
+        for t, buf in notes.items():
+            if not buf.changed:
+                continue
+            if t == "style.md":
+                docs[t] = (buf.head + "\n" + "\n".join(buf.lines) + "\n").lstrip("\n")
+            else:
+                docs[t]["notes"] = buf.text()
+        if dirty:
+            write_canon_bundle(canon_dir, {t: docs[t] for t in dirty})
     return stats
 
 
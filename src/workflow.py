@@ -5,7 +5,7 @@ from langgraph.graph import StateGraph, END
 from state import StoryState
 from agents.writer import writer_agent
 from agents.editor import editor_agent
-from agents.memory import memory_agent
+from agents.memory import discard_chapter_memory_prefetch, memory_agent, prefetch_chapter_memory
 from agents.canon_update import canon_update_agent
 from agents.materials_update import materials_update_agent
 
@@ -15,14 +15,35 @@ def _next_step_after_editor(state: StoryState):
     if not needs_rewrite:
         return "memory"
 
-    writer_version = int(state.get("writer_version", 1))
-    max_rewrites = int(state.get("max_rewrites", 1))
-    if writer_version < 1 + max_rewrites:
+    if not _is_last_review(state):
         return "writer"
     # 达到返工次数上限：仍然进入 memory（沉淀本章记忆），再由后续节点自行决定是否做设定沉淀。
     return "memory"
 
 
+def _is_last_review(state: StoryState) -> bool:
+    writer_version = int(state.get("writer_version", 1))
+    max_rewrites = int(state.get("max_rewrites", 1))
+    return writer_version >= 1 + max_rewrites
+
+
+def _editor_node(state: StoryState) -> StoryState:
+    """
+    主编节点：最后一轮审核时，无论结论如何下一步都是 memory，
+    且记忆抽取只依赖正文，因此可与主编的 LLM 调用并发（editor_overlap_memory 开启时）。
+    """
+    if not (state.get("editor_overlap_memory") and _is_last_review(state)):
+        return editor_agent(state)
+    # 预取的 Future 登记在 agents.memory 的模块级登记表里（不进 state，保持 state 可序列化）
+    prefetch_chapter_memory(state)
+    try:
+        return editor_agent(state)
+    except BaseException:
+        # 本章不会再进入 memory：作废预取，避免登记表残留
+        discard_chapter_memory_prefetch(state)
+        raise
+
+
 def build_chapter_app():
     """
     章节子工作流：写手 -> 主编（不通过则返工到写手，最多 max_rewrites 次）
@@ -31,7 +52,7 @@ def build_chapter_app():
     """
     graph = StateGraph(StoryState)
     graph.add_node("writer", writer_agent)
-    graph.add_node("editor", editor_agent)
+    graph.add_node("editor", _editor_node)
     graph.add_node("memory", memory_agent)
     graph.add_node("canon_update", canon_update_agent)
     graph.add_node("materials_update", materials_update_agent)
@@ -0,0 +1,36 @@
+from __future__ import annotations
+
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+
+from json_utils import budget_json, dumps_compact  # noqa: E402
+from storage import build_canon_text_for_context  # noqa: E402
+
+
+def test_budget_json_fits_budget_unchanged():
+    obj = {"world": {"rules": [{"name": "规则1"}]}, "timeline": {}}
+    assert budget_json(obj, 6000) == dumps_compact(obj)
+
+
+def test_budget_json_truncates_to_valid_json():
+    obj = {"world": {"rules": [{"name": f"规则{i}", "d": "说明" * 20} for i in range(200)]}}
+    out = budget_json(obj, 600)
+    assert 0 < len(out) <= 600
+    assert isinstance(json.loads(out), dict)
+
+
+def test_budget_json_nothing_closes_returns_empty():
+    assert budget_json({"world": {"notes": "x" * 7000}}, 6000) == ""
+
+
+def test_canon_text_oversized_first_value_not_empty(tmp_path):
+    # 首条设定本身超出预算：budget_json 闭合不了任何子结构，Canon 段落仍需带上首尾截断的内容
+    canon_dir = tmp_path / "canon"
+    canon_dir.mkdir()
+    (canon_dir / "world.json").write_text(json.dumps({"notes": "x" * 7000}), encoding="utf-8")
+    text = build_canon_text_for_context(str(tmp_path), chapter_index=1)
+    assert text.startswith('{"world":{"notes":"xxx')
+    assert len(text) > 5000